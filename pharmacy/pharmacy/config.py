@@ -8,4 +8,34 @@ DBG = os.getenv("DEBUG") == "True"
 TZ = os.getenv("TIME_ZONE", "UTC")
 LOW_QTY_THRESHOLD = float(os.getenv("LOW_QTY_THRESHOLD", 0.8))
 MAX_DISCOUNT_PERCENTAGE = int(os.getenv("MAX_DISCOUNT_PERCENTAGE", 10))
+SHORT_EXPIRY_DAYS = int(os.getenv("SHORT_EXPIRY_DAYS", 180))
 ONLY_SUPER_USER_CANCEL_ORDER = os.getenv("ONLY_SUPER_USER_CANCEL_ORDER") == "True"
+LIST_COUNT_CACHE_TIMEOUT = int(os.getenv("LIST_COUNT_CACHE_TIMEOUT", 300))
+AUTOCOMPLETE_MAX_AGE = int(os.getenv("AUTOCOMPLETE_MAX_AGE", 600))
+STOCK_SCAN_CACHE_TIMEOUT = int(os.getenv("STOCK_SCAN_CACHE_TIMEOUT", 300))
+QUERY_BUDGET_STRICT = os.getenv("QUERY_BUDGET_STRICT") == "True"
+SQL_LOG_LEVEL = os.getenv("SQL_LOG_LEVEL", "WARNING")
+REFERENCE_CACHE_TIMEOUT = int(os.getenv("REFERENCE_CACHE_TIMEOUT", 24 * 60 * 60))
+# e.g. redis://localhost:6379/0, shares the cache between workers and hosts
+CACHE_URL = os.getenv("CACHE_URL")
+SYNC_BATCH_SIZE = int(os.getenv("SYNC_BATCH_SIZE", 500))
+SYNC_WATERMARK_SKEW = int(os.getenv("SYNC_WATERMARK_SKEW", 60))
+SYNC_TOMBSTONE_DAYS = int(os.getenv("SYNC_TOMBSTONE_DAYS", 30))
+EXPORT_CHUNK_SIZE = int(os.getenv("EXPORT_CHUNK_SIZE", 2000))
+
+# Local SQLite database, see settings/local.py
+SQLITE_NAME = os.getenv("SQLITE_NAME")
+SQLITE_TUNED = os.getenv("SQLITE_TUNED", "True") == "True"
+
+# Production database, see settings/prod.py
+DB_NAME = os.getenv("DB_NAME", "pharmacy")
+DB_USER = os.getenv("DB_USER", "pharmacy")
+DB_PASSWORD = os.getenv("DB_PASSWORD", "")
+DB_HOST = os.getenv("DB_HOST", "localhost")
+DB_PORT = os.getenv("DB_PORT", "5432")
+DB_REPLICA_HOSTS = [
+    host for host in os.getenv("DB_REPLICA_HOSTS", "").split(",") if host
+]
+DB_CONN_MAX_AGE = int(os.getenv("DB_CONN_MAX_AGE", 60))
+DB_STATEMENT_TIMEOUT_MS = int(os.getenv("DB_STATEMENT_TIMEOUT_MS", 30000))
+DB_PGBOUNCER = os.getenv("DB_PGBOUNCER") == "True"
@@ -6,6 +6,7 @@ class Company(models.Model):
     name = models.CharField(max_length=255, unique=True)
     address = models.CharField(max_length=255, null=True, blank=True)
     contact_number = models.CharField(max_length=15, default=None, null=True)
+    updated_at = models.DateTimeField(auto_now=True)
 
     def __str__(self):
         return self.name
@@ -14,6 +15,7 @@ class Company(models.Model):
 class Formula(models.Model):
     name = models.CharField(max_length=255, unique=True)
     description = models.TextField(null=True, blank=True)
+    updated_at = models.DateTimeField(auto_now=True)
 
     def __str__(self):
         return self.name
@@ -0,0 +1,42 @@
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+from pharmacy.product.models import Product
+from pharmacy.utills.cache import bump_cache_version_on_commit
+from .models import Company, Customer, Distribution, Formula
+from .views import (
+    CompanyViewSet,
+    CustomerViewSet,
+    DistributionViewSet,
+    FormulaViewSet,
+)
+
+
+@receiver(post_save, sender=Company)
+@receiver(post_delete, sender=Company)
+# Companies can be listed by the distribution of their products
+@receiver(post_save, sender=Product)
+@receiver(post_delete, sender=Product)
+def invalidate_company_list(sender, using=None, **kwargs):
+    bump_cache_version_on_commit(CompanyViewSet.cache_namespace, using=using)
+
+
+@receiver(post_save, sender=Distribution)
+@receiver(post_delete, sender=Distribution)
+def invalidate_distribution_list(sender, using=None, **kwargs):
+    bump_cache_version_on_commit(
+        DistributionViewSet.cache_namespace,
+        CompanyViewSet.cache_namespace,
+        using=using,
+    )
+
+
+@receiver(post_save, sender=Formula)
+@receiver(post_delete, sender=Formula)
+def invalidate_formula_list(sender, using=None, **kwargs):
+    bump_cache_version_on_commit(FormulaViewSet.cache_namespace, using=using)
+
+
+@receiver(post_save, sender=Customer)
+@receiver(post_delete, sender=Customer)
+def invalidate_customer_list(sender, using=None, **kwargs):
+    bump_cache_version_on_commit(CustomerViewSet.cache_namespace, using=using)
@@ -9,6 +9,7 @@ from .serializers import (
 from rest_framework.permissions import IsAdminUser, IsAuthenticated
 from rest_framework.views import APIView, Response, status
 from rest_framework.exceptions import NotFound
+from pharmacy.utills.views import CachedListMixin, ConditionalGetMixin
 
 
 # class CompanyViewSet(viewsets.ModelViewSet):
@@ -24,9 +25,10 @@ from rest_framework.exceptions import NotFound
 #         return [permission() for permission in permission_classes]
 
 
-class CompanyViewSet(viewsets.ModelViewSet):
+class CompanyViewSet(CachedListMixin, viewsets.ModelViewSet):
     queryset = Company.objects.all()
     serializer_class = CompanySerializer
+    cache_namespace = "company"
 
     def get_queryset(self):
         """
@@ -63,9 +65,12 @@ class CompanyViewSet(viewsets.ModelViewSet):
         return [permission() for permission in permission_classes]
 
 
-class DistributionViewSet(viewsets.ModelViewSet):
+class DistributionViewSet(ConditionalGetMixin, CachedListMixin, viewsets.ModelViewSet):
     queryset = Distribution.objects.all()
     serializer_class = DistributionSerializer
+    cache_namespace = "distribution"
+    # Lists are revalidated against the cache version instead
+    conditional_actions = ["retrieve"]
 
     def get_permissions(self):
         if self.action in ["destroy"]:
@@ -76,9 +81,10 @@ class DistributionViewSet(viewsets.ModelViewSet):
         return [permission() for permission in permission_classes]
 
 
-class FormulaViewSet(viewsets.ModelViewSet):
+class FormulaViewSet(CachedListMixin, viewsets.ModelViewSet):
     queryset = Formula.objects.all()
     serializer_class = FormulaSerializer
+    cache_namespace = "formula"
 
     def get_permissions(self):
         if self.action in ["destroy"]:
@@ -89,9 +95,12 @@ class FormulaViewSet(viewsets.ModelViewSet):
         return [permission() for permission in permission_classes]
 
 
-class CustomerViewSet(viewsets.ModelViewSet):
+class CustomerViewSet(ConditionalGetMixin, CachedListMixin, viewsets.ModelViewSet):
     queryset = Customer.objects.all()
     serializer_class = CustomerSerializer
+    cache_namespace = "customer"
+    # Lists are revalidated against the cache version instead
+    conditional_actions = ["retrieve"]
 
     def get_permissions(self):
         if self.action in ["destroy"]:
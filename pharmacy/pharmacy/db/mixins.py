@@ -0,0 +1,22 @@
+from .routers import replica_reads
+
+
+class ReplicaReadMixin:
+    """
+    Serves the listed viewset actions from a read replica. They may lag behind
+    the primary, so only use it for reads that tolerate slightly stale data.
+    """
+
+    replica_actions = ["list", "retrieve"]
+
+    def initial(self, request, *args, **kwargs):
+        if self.action in self.replica_actions and request.method in ("GET", "HEAD"):
+            self.replica_token = replica_reads.set(True)
+        super().initial(request, *args, **kwargs)
+
+    def finalize_response(self, request, response, *args, **kwargs):
+        token = getattr(self, "replica_token", None)
+        if token is not None:
+            replica_reads.reset(token)
+            self.replica_token = None
+        return super().finalize_response(request, response, *args, **kwargs)
@@ -0,0 +1,41 @@
+import random
+from contextlib import contextmanager
+from contextvars import ContextVar
+
+from django.conf import settings
+
+# Set while a request may be served from a read replica, see ReplicaReadMixin
+replica_reads = ContextVar("replica_reads", default=False)
+
+
+@contextmanager
+def read_from_replica():
+    token = replica_reads.set(True)
+    try:
+        yield
+    finally:
+        replica_reads.reset(token)
+
+
+class ReplicaRouter:
+    """
+    Sends reads made inside ``read_from_replica()`` to one of the
+    ``DATABASE_REPLICAS`` aliases. Everything else, including all writes and
+    migrations, stays on ``default``.
+    """
+
+    def db_for_read(self, model, **hints):
+        replicas = getattr(settings, "DATABASE_REPLICAS", [])
+        if replicas and replica_reads.get():
+            return random.choice(replicas)
+        return "default"
+
+    def db_for_write(self, model, **hints):
+        return "default"
+
+    def allow_relation(self, obj1, obj2, **hints):
+        # Replicas hold the same data as the primary
+        return True
+
+    def allow_migrate(self, db, app_label, model_name=None, **hints):
+        return db == "default"
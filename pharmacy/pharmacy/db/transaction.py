@@ -0,0 +1,28 @@
+from contextlib import contextmanager
+
+from django.db import DEFAULT_DB_ALIAS, connections, transaction
+
+
+@contextmanager
+def immediate_atomic(using=None):
+    """
+    ``transaction.atomic()`` that takes SQLite's write lock when it begins, for
+    transactions that read and then write. Waiting for the lock at BEGIN lets
+    the busy timeout apply, while a deferred transaction that can't upgrade to
+    a writer fails straight away. Behaves like ``atomic()`` on other databases
+    and when nested.
+    """
+    connection = connections[using or DEFAULT_DB_ALIAS]
+    if connection.in_atomic_block or not hasattr(connection, "transaction_mode"):
+        with transaction.atomic(using=using):
+            yield
+        return
+
+    connection.transaction_mode = "IMMEDIATE"
+    try:
+        with transaction.atomic(using=using):
+            # BEGIN has run, later transactions go back to the default mode
+            del connection.transaction_mode
+            yield
+    finally:
+        connection.__dict__.pop("transaction_mode", None)
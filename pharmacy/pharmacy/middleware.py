@@ -0,0 +1,100 @@
+import logging
+import time
+from contextlib import ExitStack
+
+from django.conf import settings
+from django.db import connections
+
+logger = logging.getLogger("pharmacy.sql")
+
+
+class QueryBudgetExceeded(Exception):
+    pass
+
+
+class QueryRecorder:
+    """``execute_wrapper`` hook counting and timing every statement of a request."""
+
+    def __init__(self, keep_slowest):
+        self.keep_slowest = keep_slowest
+        self.count = 0
+        self.duration = 0.0
+        self.slowest = []
+
+    def __call__(self, execute, sql, params, many, context):
+        start = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            duration = time.perf_counter() - start
+            self.count += 1
+            self.duration += duration
+            self.slowest.append((duration, sql))
+            self.slowest.sort(key=lambda item: item[0], reverse=True)
+            del self.slowest[self.keep_slowest :]
+
+
+def get_view_name(view_func, method):
+    """``ProductViewSet.list`` for viewsets, ``OrderAPIView.post`` for API views."""
+    view_class = getattr(view_func, "cls", None)
+    if view_class is None:
+        return getattr(view_func, "__name__", None)
+    actions = getattr(view_func, "actions", None) or {}
+    return f"{view_class.__name__}.{actions.get(method, method)}"
+
+
+class QueryBudgetMiddleware:
+    """
+    Records the SQL each request runs, reports it in a ``Server-Timing`` header
+    and the ``pharmacy.sql`` log, and checks it against ``QUERY_BUDGETS``.
+    Exceeding a budget logs a warning, or raises when ``QUERY_BUDGET_STRICT``.
+    """
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        recorder = QueryRecorder(settings.QUERY_LOG_SLOWEST)
+        request.view_name = None
+        with ExitStack() as stack:
+            for connection in connections.all():
+                stack.enter_context(connection.execute_wrapper(recorder))
+            response = self.get_response(request)
+
+        response["Server-Timing"] = (
+            f'db;dur={recorder.duration * 1000:.1f};desc="{recorder.count} queries"'
+        )
+        logger.info(
+            "%s %s ran %d queries in %.1fms",
+            request.method,
+            request.path,
+            recorder.count,
+            recorder.duration * 1000,
+            extra={
+                "view": request.view_name,
+                "status_code": response.status_code,
+                "query_count": recorder.count,
+                "query_ms": round(recorder.duration * 1000, 1),
+                "slowest_queries": [
+                    {"ms": round(duration * 1000, 1), "sql": sql}
+                    for duration, sql in recorder.slowest
+                ],
+            },
+        )
+        self.check_budget(request, recorder)
+        return response
+
+    def process_view(self, request, view_func, view_args, view_kwargs):
+        request.view_name = get_view_name(view_func, request.method.lower())
+
+    def check_budget(self, request, recorder):
+        budget = settings.QUERY_BUDGETS.get(request.view_name)
+        if budget is None or recorder.count <= budget:
+            return
+        message = (
+            f"{request.view_name} ran {recorder.count} queries, "
+            f"its budget is {budget}"
+        )
+        if settings.QUERY_BUDGET_STRICT:
+            raise QueryBudgetExceeded(message)
+        logger.warning(message, extra={"view": request.view_name})
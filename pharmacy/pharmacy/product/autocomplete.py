@@ -0,0 +1,156 @@
+"""
+In-process prefix index for the point-of-sale product lookup.
+
+Each worker process holds its own copy. It is built on startup (or first use),
+kept current by the signals in ``signals.py`` for writes made by this process, and
+rebuilt once it is older than AUTOCOMPLETE_MAX_AGE so writes made by other
+workers show up too.
+"""
+
+import logging
+import threading
+import time
+from bisect import bisect_left, insort
+
+from django.db import DatabaseError
+from pharmacy.config import AUTOCOMPLETE_MAX_AGE
+from .models import Product, Stock
+
+logger = logging.getLogger(__name__)
+
+
+class ProductPrefixIndex:
+    def __init__(self):
+        self._lock = threading.RLock()
+        # Sorted (key, product_id) pairs, searched with bisect
+        self._entries = []
+        self._keys_by_product = {}
+        self._products = {}
+        self._built_at = None
+
+    @staticmethod
+    def _keys_for(name, formula_name, barcodes):
+        name = name.lower()
+        words = name.split()
+        # Every word of the name is searchable, e.g. "ext" finds "Panadol Extra"
+        keys = {" ".join(words[i:]) for i in range(len(words))}
+        if formula_name:
+            keys.add(formula_name.lower())
+        keys.update(barcode.lower() for barcode in barcodes)
+        return keys
+
+    def _load(self, product_ids=None):
+        products = Product.objects.values(
+            "id",
+            "name",
+            "product_type",
+            "formula__name",
+            "stock_summary__live_qty",
+        )
+        # Only batches still on the shelf can be scanned
+        stocks = Stock.objects.filter(qty__gt=0, barcode__isnull=False)
+        if product_ids is not None:
+            products = products.filter(id__in=product_ids)
+            stocks = stocks.filter(product_id__in=product_ids)
+
+        barcodes = {}
+        for product_id, barcode in stocks.values_list("product_id", "barcode"):
+            barcodes.setdefault(product_id, []).append(barcode)
+        return products, barcodes
+
+    def _add(self, row, barcodes):
+        product_id = row["id"]
+        self._products[product_id] = {
+            "id": product_id,
+            "name": row["name"],
+            "product_type": row["product_type"],
+            "qty": row["stock_summary__live_qty"] or 0,
+        }
+        keys = self._keys_for(row["name"], row["formula__name"], barcodes)
+        self._keys_by_product[product_id] = keys
+        for key in keys:
+            insort(self._entries, (key, product_id))
+
+    def _remove(self, product_id):
+        self._products.pop(product_id, None)
+        for key in self._keys_by_product.pop(product_id, ()):
+            position = bisect_left(self._entries, (key, product_id))
+            if self._entries[position : position + 1] == [(key, product_id)]:
+                del self._entries[position]
+
+    def build(self):
+        products, barcodes = self._load()
+        entries, keys_by_product, rows = [], {}, {}
+        for row in products:
+            keys = self._keys_for(
+                row["name"], row["formula__name"], barcodes.get(row["id"], [])
+            )
+            keys_by_product[row["id"]] = keys
+            entries.extend((key, row["id"]) for key in keys)
+            rows[row["id"]] = {
+                "id": row["id"],
+                "name": row["name"],
+                "product_type": row["product_type"],
+                "qty": row["stock_summary__live_qty"] or 0,
+            }
+        entries.sort()
+
+        with self._lock:
+            self._entries = entries
+            self._keys_by_product = keys_by_product
+            self._products = rows
+            self._built_at = time.monotonic()
+
+    def clear(self):
+        with self._lock:
+            self._entries, self._keys_by_product, self._products = [], {}, {}
+            self._built_at = None
+
+    def warm_up(self):
+        try:
+            self.build()
+        except DatabaseError:
+            # e.g. migrations not applied yet; the first lookup builds it instead
+            logger.warning("Could not build the product autocomplete index")
+
+    def update_products(self, product_ids):
+        with self._lock:
+            if self._built_at is None:
+                return
+            products, barcodes = self._load(product_ids)
+            for product_id in product_ids:
+                self._remove(product_id)
+            for row in products:
+                self._add(row, barcodes.get(row["id"], []))
+
+    def remove_products(self, product_ids):
+        with self._lock:
+            for product_id in product_ids:
+                self._remove(product_id)
+
+    def lookup(self, prefix, limit=10):
+        prefix = prefix.strip().lower()
+        if not prefix:
+            return []
+
+        if (
+            self._built_at is None
+            or time.monotonic() - self._built_at > AUTOCOMPLETE_MAX_AGE
+        ):
+            self.build()
+
+        with self._lock:
+            results, seen = [], set()
+            position = bisect_left(self._entries, (prefix,))
+            while position < len(self._entries) and len(results) < limit:
+                key, product_id = self._entries[position]
+                if not key.startswith(prefix):
+                    break
+                if product_id not in seen:
+                    seen.add(product_id)
+                    results.append(self._products[product_id])
+                position += 1
+            return results
+
+
+product_index = ProductPrefixIndex()
@@ -1,11 +1,29 @@
 import django_filters
-from .models import Product, Stock
+from .models import Order, Product, Stock
 from django.utils import timezone
-from django.db.models import QuerySet, F, Case, When, Value, BooleanField, Q, F, Sum
+from django.db.models import QuerySet, F, Exists, OuterRef, Value, Q, Sum
 from datetime import timedelta
 from pharmacy.utills.enums import ExpiryEnum, LowQuantityEnums, LowQuantityThresholEnum
 from django.db.models.functions import Coalesce
 from datetime import date, datetime
+from pharmacy.config import SHORT_EXPIRY_DAYS
+from .search import search_products
+
+
+def expiration_condition(value: str) -> Q:
+    today = timezone.now().date()
+    short_expiry_limit = today + timedelta(days=SHORT_EXPIRY_DAYS)
+
+    if value == ExpiryEnum.EXPIRED.value:
+        return Q(expiry_date__lt=today)
+    elif value == ExpiryEnum.SHORT_EXPIRED.value:
+        return Q(expiry_date__gte=today, expiry_date__lt=short_expiry_limit)
+    return Q(expiry_date__lt=short_expiry_limit)
+
+
+def has_explicit_ordering(filterset) -> bool:
+    # Search results are ranked by relevance unless the client asked for an order
+    return bool(filterset.request and filterset.request.query_params.get("ordering"))
 
 
 class ProductFilter(django_filters.FilterSet):
@@ -15,6 +33,7 @@ class ProductFilter(django_filters.FilterSet):
     formula_ids = django_filters.CharFilter(method="filter_by_formula_ids")
     low_qty = django_filters.CharFilter(method="filter_low_qty")
     showInactive = django_filters.BooleanFilter(method="filter_show_inactive")
+    search = django_filters.CharFilter(method="filter_search")
 
     class Meta:
         model = Product  # changed from ProductProxy
@@ -51,35 +70,12 @@ class ProductFilter(django_filters.FilterSet):
             raise ValueError(
                 f"Invalid expiration value. allowed values are: {ExpiryEnum.list_all_values()}"
             )
-        today = timezone.now().date()
-        six_months_later = today + timedelta(days=180)
-
-        queryset = queryset.annotate(
-            is_expired=Case(
-                When(stocks__expiry_date__lt=Value(today), then=Value(True)),
-                default=Value(False),
-                output_field=BooleanField(),
-            ),
-            is_short_expired=Case(
-                When(
-                    stocks__expiry_date__gte=Value(today),
-                    stocks__expiry_date__lt=Value(six_months_later),
-                    then=(Value(True)),
-                ),
-                default=Value(False),
-                output_field=BooleanField(),
-            ),
+        # A correlated EXISTS keeps one row per product, so no join or distinct
+        product_stocks = Stock.objects.filter(product=OuterRef("pk"))
+        return queryset.filter(
+            Exists(product_stocks.filter(expiration_condition(value)))
         )
 
-        if value == ExpiryEnum.EXPIRED.value:
-            return queryset.filter(is_expired=True).distinct()
-        elif value == ExpiryEnum.SHORT_EXPIRED.value:
-            return queryset.filter(is_short_expired=True).distinct()
-        elif value == ExpiryEnum.EXPIRED_AND_SHORT_EXPIRED.value:
-            return queryset.filter(
-                Q(is_expired=True) | Q(is_short_expired=True)
-            ).distinct()
-
     def filter_low_qty(self, queryset: QuerySet, name: str, value: str):
         if value not in LowQuantityEnums.list_all_values():
             raise ValueError(
@@ -117,6 +113,9 @@ class ProductFilter(django_filters.FilterSet):
             return queryset
         return queryset.filter(avg_qty__gt=0)
 
+    def filter_search(self, queryset: QuerySet, name: str, value: str):
+        return search_products(queryset, value, rank=not has_explicit_ordering(self))
+
 
 class StockFilter(django_filters.FilterSet):
     product_type = django_filters.CharFilter(
@@ -130,6 +129,7 @@ class StockFilter(django_filters.FilterSet):
     end_date = django_filters.CharFilter(method="filter_end_date")
     expiration = django_filters.CharFilter(method="filter_expiration")
     showInactive = django_filters.BooleanFilter(method="filter_show_inactive")
+    search = django_filters.CharFilter(method="filter_search")
 
     def filter_start_date(self, queryset, name, value):
         try:
@@ -156,34 +156,7 @@ class StockFilter(django_filters.FilterSet):
             raise ValueError(
                 f"Invalid expiration value. allowed values are: {ExpiryEnum.list_all_values()}"
             )
-        today = timezone.now().date()
-        six_months_later = today + timedelta(days=180)
-
-        queryset = queryset.annotate(
-            is_expired=Case(
-                When(expiry_date__lt=Value(today), then=Value(True)),
-                default=Value(False),
-                output_field=BooleanField(),
-            ),
-            is_short_expired=Case(
-                When(
-                    expiry_date__gte=Value(today),
-                    expiry_date__lt=Value(six_months_later),
-                    then=(Value(True)),
-                ),
-                default=Value(False),
-                output_field=BooleanField(),
-            ),
-        )
-
-        if value == ExpiryEnum.EXPIRED.value:
-            return queryset.filter(is_expired=True).distinct()
-        elif value == ExpiryEnum.SHORT_EXPIRED.value:
-            return queryset.filter(is_short_expired=True).distinct()
-        elif value == ExpiryEnum.EXPIRED_AND_SHORT_EXPIRED.value:
-            return queryset.filter(
-                Q(is_expired=True) | Q(is_short_expired=True)
-            ).distinct()
+        return queryset.filter(expiration_condition(value))
 
     def product_name_filter(self, queryset: QuerySet, name, value):
         if value:
@@ -195,6 +168,15 @@ class StockFilter(django_filters.FilterSet):
             return queryset
         return queryset.filter(qty__gt=0)
 
+    def filter_search(self, queryset: QuerySet, name: str, value: str):
+        return search_products(
+            queryset,
+            value,
+            product_field="product_id",
+            name_field="product__name",
+            rank=not has_explicit_ordering(self),
+        )
+
     class Meta:
         model = Stock
         fields = {
@@ -205,3 +187,19 @@ class StockFilter(django_filters.FilterSet):
             "product__product_type": ["exact"],
             "bought_from__id": ["exact"],
         }
+
+
+class OrderFilter(django_filters.FilterSet):
+    start_date = django_filters.DateTimeFilter(
+        field_name="created_at", lookup_expr="gte"
+    )
+    end_date = django_filters.DateTimeFilter(field_name="created_at", lookup_expr="lte")
+
+    class Meta:
+        model = Order
+        fields = {
+            "id": ["exact"],
+            "status": ["exact"],
+            "customer": ["exact"],
+            "created_by": ["exact"],
+        }
@@ -0,0 +1,119 @@
+import re
+from datetime import date
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connections
+from django.db.models import Q
+from pharmacy.product.filters import ProductFilter, StockFilter
+from pharmacy.product.models import Order, Product, Stock
+from pharmacy.product.views import ProductViewSet, StockViewSet
+from pharmacy.utills.enums import ExpiryEnum, LowQuantityEnums, OrderStatusEnum
+
+# Plan lines that read the whole stock table rather than an index
+SEQUENTIAL_STOCK_SCAN = {
+    "sqlite": re.compile(r"\bSCAN (TABLE )?product_stock\b(?! USING)"),
+    "postgresql": re.compile(r"\bSeq Scan on product_stock\b"),
+}
+
+
+class Command(BaseCommand):
+    help = (
+        "EXPLAIN the queries behind the main endpoints and fail if any of them "
+        "scans the whole stock table once it is larger than --max-seq-scan-rows."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--max-seq-scan-rows",
+            type=int,
+            default=10000,
+            help="Stock table size above which sequential scans are reported as failures",
+        )
+        parser.add_argument(
+            "--verbose-plans",
+            action="store_true",
+            help="Print the full plan of every query",
+        )
+
+    def get_queries(self):
+        products = ProductViewSet().get_queryset().order_by("name")
+        stocks = StockViewSet.queryset.order_by("-entry_date")
+        product_id = Product.objects.values_list("id", flat=True).first() or 0
+
+        queries = [
+            ("products list", products),
+            (
+                "product stocks prefetch",
+                Stock.objects.filter(qty__gt=0, product_id__in=[product_id]),
+            ),
+            (
+                "product total_qty",
+                Stock.objects.filter(
+                    Q(expiry_date__gte=date.today()) | Q(expiry_date__isnull=True),
+                    product_id=product_id,
+                ).order_by(),
+            ),
+            ("stocks list", stocks),
+            (
+                "stocks by entry date",
+                StockFilter({"start_date": "2024-01-01 00:00:00"}, queryset=stocks).qs,
+            ),
+            (
+                "orders by status",
+                Order.objects.filter(status=OrderStatusEnum.PENDING.value),
+            ),
+        ]
+        for value in ExpiryEnum.list_all_values():
+            queries.append(
+                (
+                    f"products expiration={value}",
+                    ProductFilter({"expiration": value}, queryset=products).qs,
+                )
+            )
+            queries.append(
+                (
+                    f"stocks expiration={value}",
+                    StockFilter(
+                        {"expiration": value, "showInactive": "false"},
+                        queryset=stocks,
+                    ).qs,
+                )
+            )
+        for value in LowQuantityEnums.list_all_values():
+            queries.append(
+                (
+                    f"products low_qty={value}",
+                    ProductFilter({"low_qty": value}, queryset=products).qs,
+                )
+            )
+        # Endpoints only ever read a page at a time
+        return [(label, queryset[:20]) for label, queryset in queries]
+
+    def handle(self, *args, **options):
+        vendor = connections[Stock.objects.db].vendor
+        pattern = SEQUENTIAL_STOCK_SCAN.get(vendor)
+        if pattern is None:
+            raise CommandError(f"Query plans can't be checked on {vendor}.")
+
+        stock_rows = Stock.objects.count()
+        enforce = stock_rows > options["max_seq_scan_rows"]
+
+        failures = []
+        for label, queryset in self.get_queries():
+            plan = queryset.explain()
+            scans_stock = bool(pattern.search(plan))
+            if scans_stock and enforce:
+                failures.append(label)
+                verdict = self.style.ERROR("SEQ SCAN")
+            elif scans_stock:
+                verdict = self.style.WARNING("seq scan (table below threshold)")
+            else:
+                verdict = self.style.SUCCESS("ok")
+            self.stdout.write(f"{label:<40} {verdict}")
+            if options["verbose_plans"]:
+                self.stdout.write(plan)
+
+        if failures:
+            raise CommandError(
+                f"Sequential scans over {stock_rows} stock rows: {', '.join(failures)}"
+            )
@@ -0,0 +1,219 @@
+import random
+from datetime import date, timedelta
+from decimal import Decimal
+
+from django.core.management import call_command
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from django.utils import timezone
+from pharmacy.core.models import Company, Customer, Distribution, Formula
+from pharmacy.product.choices import ProductTypeChoices
+from pharmacy.product.models import (
+    InventoryDiscrepancy,
+    Order,
+    Product,
+    Stock,
+    StockOrder,
+)
+from pharmacy.utills.enums import DiscrepancyTypeEnum, OrderStatusEnum
+
+
+class Command(BaseCommand):
+    help = (
+        "Fill the database with a synthetic pharmacy of configurable size, for "
+        "benchmarks and load tests. Everything is written with bulk inserts."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--companies", type=int, default=50)
+        parser.add_argument("--formulas", type=int, default=300)
+        parser.add_argument("--distributions", type=int, default=20)
+        parser.add_argument("--customers", type=int, default=200)
+        parser.add_argument("--products", type=int, default=5000)
+        parser.add_argument(
+            "--stocks-per-product",
+            type=int,
+            default=8,
+            help="Average number of batches per product",
+        )
+        parser.add_argument("--orders", type=int, default=5000)
+        parser.add_argument(
+            "--lines-per-order",
+            type=int,
+            default=3,
+            help="Average number of stock lines per order",
+        )
+        parser.add_argument("--discrepancies", type=int, default=500)
+        parser.add_argument(
+            "--prefix",
+            default="Synthetic",
+            help="Prefix of every generated name, change it to generate twice",
+        )
+        parser.add_argument("--seed", type=int, default=0)
+        parser.add_argument("--batch-size", type=int, default=1000)
+
+    def handle(self, *args, **options):
+        self.random = random.Random(options["seed"])
+        self.batch_size = options["batch_size"]
+        prefix = options["prefix"]
+
+        with transaction.atomic():
+            companies = self.create(
+                Company,
+                [
+                    Company(name=f"{prefix} Company {i}")
+                    for i in range(options["companies"])
+                ],
+            )
+            formulas = self.create(
+                Formula,
+                [
+                    Formula(name=f"{prefix} Formula {i}")
+                    for i in range(options["formulas"])
+                ],
+            )
+            distributions = self.create(
+                Distribution,
+                [
+                    Distribution(name=f"{prefix} Distribution {i}")
+                    for i in range(options["distributions"])
+                ],
+            )
+            customers = self.create(
+                Customer,
+                [
+                    Customer(name=f"{prefix} Customer {i}")
+                    for i in range(options["customers"])
+                ],
+            )
+            products = self.create_products(
+                prefix, options["products"], companies, formulas, distributions
+            )
+            stocks = self.create_stocks(
+                products, options["stocks_per_product"], distributions
+            )
+            orders = self.create_orders(
+                options["orders"], options["lines_per_order"], stocks, customers
+            )
+            discrepancies = self.create_discrepancies(options["discrepancies"], stocks)
+
+        # Bulk inserts skip the signals that keep these up to date
+        call_command("rebuild_stock_summary", batch_size=self.batch_size)
+        call_command("rebuild_product_search")
+
+        self.stdout.write(
+            self.style.SUCCESS(
+                f"Generated {len(products)} products, {len(stocks)} stocks, "
+                f"{len(orders)} orders and {len(discrepancies)} discrepancies"
+            )
+        )
+
+    def create(self, model, objs):
+        return model.objects.bulk_create(objs, batch_size=self.batch_size)
+
+    def create_products(self, prefix, count, companies, formulas, distributions):
+        product_types = [value for value, _ in ProductTypeChoices.get_choices()]
+        return self.create(
+            Product,
+            [
+                Product(
+                    name=f"{prefix} Product {i}",
+                    company=self.random.choice(companies),
+                    formula=self.random.choice(formulas),
+                    distribution=self.random.choice(distributions),
+                    product_type=self.random.choice(product_types),
+                    # A few discontinued products, which showInactive hides
+                    avg_qty=self.random.choice([0] + [10, 20, 50, 100] * 5),
+                    per_pack=self.random.choice([1, 1, 10, 20]),
+                )
+                for i in range(count)
+            ],
+        )
+
+    def create_stocks(self, products, per_product, distributions):
+        today = date.today()
+        stocks = []
+        for product in products:
+            for _ in range(self.random.randint(1, per_product * 2 - 1)):
+                # Mostly fresh batches, plus expired and short expiry ones
+                expiry_date = today + timedelta(days=self.random.randint(-180, 900))
+                if self.random.random() < 0.05:
+                    expiry_date = None
+                purchase_price = Decimal(self.random.randint(50, 5000)) / 10
+                stocks.append(
+                    Stock(
+                        product=product,
+                        qty=self.random.choice([0, 5, 20, 50, 100, 200]),
+                        price_per_unit=float(purchase_price) * 1.15,
+                        purchase_price=purchase_price,
+                        expiry_date=expiry_date,
+                        bought_from=self.random.choice(distributions),
+                    )
+                )
+        return Stock.objects.bulk_create(stocks, batch_size=self.batch_size)
+
+    def create_orders(self, count, lines_per_order, stocks, customers):
+        if not stocks:
+            return []
+        statuses = OrderStatusEnum.list_all_values()
+        now = timezone.now()
+        orders, order_lines = [], []
+        for _ in range(count):
+            lines = [
+                (stock, self.random.randint(1, 5))
+                for stock in self.random.sample(
+                    stocks,
+                    min(len(stocks), self.random.randint(1, lines_per_order * 2 - 1)),
+                )
+            ]
+            total = sum(
+                Decimal(str(stock.price_per_unit)) * qty for stock, qty in lines
+            ).quantize(Decimal("0.01"))
+            orders.append(
+                Order(
+                    customer=self.random.choice(customers) if customers else None,
+                    status=self.random.choice(statuses),
+                    total_amount=total,
+                    total_after_disc=total,
+                )
+            )
+            order_lines.append(lines)
+
+        orders = self.create(Order, orders)
+        # created_at is auto_now_add, spread it over the past year afterwards
+        for order in orders:
+            order.created_at = now - timedelta(minutes=self.random.randint(0, 525600))
+        Order.objects.bulk_update(orders, ["created_at"], batch_size=self.batch_size)
+
+        self.create(
+            StockOrder,
+            [
+                StockOrder(order=order, stock=stock, quantity=qty)
+                for order, lines in zip(orders, order_lines)
+                for stock, qty in lines
+            ],
+        )
+        return orders
+
+    def create_discrepancies(self, count, stocks):
+        in_stock = [stock for stock in stocks if stock.qty > 0]
+        if not in_stock:
+            return []
+        discrepancy_types = [
+            DiscrepancyTypeEnum.EXPIRED.value,
+            DiscrepancyTypeEnum.LOST.value,
+            DiscrepancyTypeEnum.DAMAGED.value,
+        ]
+        discrepancies = []
+        for _ in range(count):
+            stock = self.random.choice(in_stock)
+            quantity = self.random.randint(1, stock.qty)
+            discrepancies.append(
+                InventoryDiscrepancy(
+                    discrepancy_type=self.random.choice(discrepancy_types),
+                    stock=stock,
+                    quantity=quantity,
+                    amount=quantity * stock.purchase_price,
+                )
+            )
+        return self.create(InventoryDiscrepancy, discrepancies)
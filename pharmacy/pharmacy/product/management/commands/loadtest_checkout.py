@@ -0,0 +1,229 @@
+import json
+import math
+import random
+import statistics
+import threading
+import time
+import urllib.error
+import urllib.request
+from collections import Counter, defaultdict
+from concurrent.futures import ThreadPoolExecutor
+from datetime import date
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db.models import Q, Sum
+from django.utils import timezone
+from pharmacy.core.models import Customer
+from pharmacy.product.models import Stock, StockOrder
+from pharmacy.utills.enums import OrderStatusEnum
+
+# Error texts of SQLite and PostgreSQL lock contention
+LOCK_ERRORS = (
+    "database is locked",
+    "deadlock detected",
+    "could not serialize",
+    "lock timeout",
+)
+
+
+class Command(BaseCommand):
+    help = (
+        "Drive concurrent cashiers against a running server: create, complete and "
+        "cancel orders on a small set of shared stocks. Reports throughput, "
+        "latency, lock errors and stock invariant violations. Uses the database "
+        "of the current settings to prepare the run and check the results."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--url", default="http://127.0.0.1:8000")
+        parser.add_argument("--username", required=True)
+        parser.add_argument("--password", required=True)
+        parser.add_argument("--cashiers", type=int, default=8)
+        parser.add_argument(
+            "--duration", type=float, default=30, help="Seconds to run for"
+        )
+        parser.add_argument(
+            "--hot-stocks",
+            type=int,
+            default=5,
+            help="Number of in-stock batches every cashier sells from",
+        )
+        parser.add_argument(
+            "--min-qty",
+            type=int,
+            default=50,
+            help="Only batches with at least this qty join the hot set",
+        )
+        parser.add_argument("--lines-per-order", type=int, default=2)
+        parser.add_argument(
+            "--cancel-ratio",
+            type=float,
+            default=0.2,
+            help="Share of completed orders that get cancelled again",
+        )
+        parser.add_argument("--seed", type=int, default=0)
+
+    def handle(self, *args, **options):
+        self.base_url = options["url"].rstrip("/")
+        self.token = self.obtain_token(options["username"], options["password"])
+
+        today = date.today()
+        stocks = list(
+            Stock.objects.filter(qty__gte=options["min_qty"])
+            .filter(Q(expiry_date__gte=today) | Q(expiry_date__isnull=True))
+            .order_by("id")[: options["hot_stocks"]]
+        )
+        if not stocks:
+            raise CommandError("No stock to sell, run generate_pharmacy_data first")
+        customer, _ = Customer.objects.get_or_create(name="Load test customer")
+        started_at = timezone.now()
+        initial_qty = {stock.pk: stock.qty for stock in stocks}
+
+        self.latencies = defaultdict(list)
+        self.outcomes = Counter()
+        self.lock = threading.Lock()
+        deadline = time.monotonic() + options["duration"]
+
+        def cashier(number):
+            rng = random.Random(options["seed"] + number)
+            while time.monotonic() < deadline:
+                self.checkout(rng, stocks, customer, options)
+
+        start = time.monotonic()
+        with ThreadPoolExecutor(max_workers=options["cashiers"]) as executor:
+            list(executor.map(cashier, range(options["cashiers"])))
+        elapsed = time.monotonic() - start
+
+        self.report(elapsed)
+        self.check_invariants(initial_qty, started_at)
+
+    def checkout(self, rng, stocks, customer, options):
+        lines = [
+            (stock, rng.randint(1, 3))
+            for stock in rng.sample(
+                stocks, min(len(stocks), options["lines_per_order"])
+            )
+        ]
+        payload = {
+            "customer": customer.pk,
+            # A cent off, float rounding must not push it above the server's total
+            "total_after_disc": math.floor(
+                sum(stock.price_per_unit * qty for stock, qty in lines) * 100 - 1
+            )
+            / 100,
+            "stock_orders": [
+                {"stock": stock.pk, "quantity": qty} for stock, qty in lines
+            ],
+        }
+        status, body = self.call("create", "POST", "/orders/", payload)
+        if status != 201:
+            return
+
+        order_url = f"/orders/{body['id']}/"
+        completed = {"status": OrderStatusEnum.COMPLETED.value}
+        status, _ = self.call("complete", "PATCH", order_url, completed)
+        if status == 200 and rng.random() < options["cancel_ratio"]:
+            cancelled = {"status": OrderStatusEnum.CANCELLED.value}
+            self.call("cancel", "PATCH", order_url, cancelled)
+
+    def obtain_token(self, username, password):
+        credentials = {"username": username, "password": password}
+        status, body = self.request("POST", "/api/token/", credentials)
+        if status != 200:
+            raise CommandError(f"Could not log in: {body}")
+        return body["access"]
+
+    def request(self, method, path, payload):
+        headers = {"Content-Type": "application/json"}
+        if getattr(self, "token", None):
+            headers["Authorization"] = f"Bearer {self.token}"
+        request = urllib.request.Request(
+            self.base_url + path,
+            data=json.dumps(payload).encode(),
+            headers=headers,
+            method=method,
+        )
+        try:
+            with urllib.request.urlopen(request, timeout=60) as response:
+                return response.status, json.loads(response.read() or "null")
+        except urllib.error.HTTPError as error:
+            body = error.read().decode(errors="replace")
+            try:
+                return error.code, json.loads(body)
+            except ValueError:
+                return error.code, body
+
+    def call(self, operation, method, path, payload):
+        start = time.perf_counter()
+        try:
+            status, body = self.request(method, path, payload)
+        except (urllib.error.URLError, TimeoutError) as error:
+            status, body = None, str(error)
+        duration = time.perf_counter() - start
+
+        if status in (200, 201):
+            outcome = "ok"
+        elif any(text in str(body).lower() for text in LOCK_ERRORS):
+            # Order creation reports these as a 400
+            outcome = "lock error"
+        elif status == 400:
+            # Expected once the hot stocks run low
+            outcome = "rejected"
+        else:
+            outcome = "error"
+        with self.lock:
+            self.latencies[operation].append(duration)
+            self.outcomes[operation, outcome] += 1
+        return status, body
+
+    def report(self, elapsed):
+        self.stdout.write(
+            f"{'operation':<10} {'requests':>9} {'req/s':>8} {'p50 ms':>8} "
+            f"{'p99 ms':>8} {'ok':>6} {'rejected':>9} {'lock err':>9} {'error':>6}"
+        )
+        for operation, durations in self.latencies.items():
+            # quantiles() needs two samples, short runs may have fewer
+            if len(durations) < 2:
+                p99 = max(durations)
+            else:
+                p99 = statistics.quantiles(durations, n=100, method="inclusive")[98]
+            self.stdout.write(
+                f"{operation:<10} {len(durations):>9} "
+                f"{len(durations) / elapsed:>8.1f} "
+                f"{statistics.median(durations) * 1000:>8.1f} "
+                f"{p99 * 1000:>8.1f} "
+                f"{self.outcomes[operation, 'ok']:>6} "
+                f"{self.outcomes[operation, 'rejected']:>9} "
+                f"{self.outcomes[operation, 'lock error']:>9} "
+                f"{self.outcomes[operation, 'error']:>6}"
+            )
+
+    def check_invariants(self, initial_qty, started_at):
+        # Only completed orders of this run may have taken stock away
+        sold = dict(
+            StockOrder.objects.filter(
+                stock_id__in=initial_qty,
+                order__created_at__gte=started_at,
+                order__status=OrderStatusEnum.COMPLETED.value,
+            )
+            .values("stock_id")
+            .annotate(total=Sum("quantity"))
+            .values_list("stock_id", "total")
+        )
+        violations = []
+        for stock_id, qty in Stock.objects.filter(pk__in=initial_qty).values_list(
+            "id", "qty"
+        ):
+            expected = initial_qty[stock_id] - sold.get(stock_id, 0)
+            if qty < 0:
+                violations.append(f"stock {stock_id} has negative qty {qty}")
+            if qty != expected:
+                violations.append(
+                    f"stock {stock_id} has qty {qty}, completed orders leave {expected}"
+                )
+
+        if violations:
+            for violation in violations:
+                self.stderr.write(violation)
+            raise CommandError(f"{len(violations)} stock invariant violations")
+        self.stdout.write(self.style.SUCCESS("Stock invariants hold"))
@@ -0,0 +1,14 @@
+from django.core.management.base import BaseCommand
+from pharmacy.config import SYNC_TOMBSTONE_DAYS
+from pharmacy.product.sync import prune_tombstones
+
+
+class Command(BaseCommand):
+    help = (
+        f"Delete sync tombstones older than SYNC_TOMBSTONE_DAYS "
+        f"({SYNC_TOMBSTONE_DAYS}), terminals that old resync in full anyway"
+    )
+
+    def handle(self, *args, **options):
+        deleted = prune_tombstones()
+        self.stdout.write(self.style.SUCCESS(f"Deleted {deleted} tombstones"))
@@ -0,0 +1,10 @@
+from django.core.management.base import BaseCommand
+from pharmacy.product import search
+
+
+class Command(BaseCommand):
+    help = "Rebuild the SQLite product search table, e.g. after bulk product imports"
+
+    def handle(self, *args, **options):
+        search.rebuild_index()
+        self.stdout.write(self.style.SUCCESS("Rebuilt the product search table"))
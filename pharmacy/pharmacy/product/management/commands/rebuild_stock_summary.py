@@ -0,0 +1,30 @@
+from django.core.management.base import BaseCommand
+from pharmacy.product.models import Product, ProductStockSummary
+
+
+class Command(BaseCommand):
+    help = (
+        "Rebuild the per-product stock summaries, rolling the expiry buckets "
+        "forward to today. Meant to run nightly."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--batch-size",
+            type=int,
+            default=500,
+            help="Number of products refreshed per transaction",
+        )
+
+    def handle(self, *args, **options):
+        batch_size = options["batch_size"]
+        product_ids = list(Product.objects.order_by("id").values_list("id", flat=True))
+
+        for start in range(0, len(product_ids), batch_size):
+            ProductStockSummary.refresh(product_ids[start : start + batch_size])
+
+        self.stdout.write(
+            self.style.SUCCESS(
+                f"Rebuilt stock summaries for {len(product_ids)} products"
+            )
+        )
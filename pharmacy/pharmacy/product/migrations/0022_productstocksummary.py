@@ -0,0 +1,99 @@
+# Generated by Django 5.0.6 on 2026-10-18 06:20
+
+import django.db.models.deletion
+from datetime import date, timedelta
+from django.db import migrations, models
+from django.db.models import Q, Sum
+from pharmacy.config import SHORT_EXPIRY_DAYS
+
+
+def populate_stock_summaries(apps, schema_editor):
+    Product = apps.get_model("product", "Product")
+    Stock = apps.get_model("product", "Stock")
+    ProductStockSummary = apps.get_model("product", "ProductStockSummary")
+
+    today = date.today()
+    short_expiry_limit = today + timedelta(days=SHORT_EXPIRY_DAYS)
+    totals = {
+        row["product_id"]: row
+        for row in Stock.objects.values("product_id").annotate(
+            live_qty=Sum(
+                "qty", filter=Q(expiry_date__gte=today) | Q(expiry_date__isnull=True)
+            ),
+            expired_qty=Sum("qty", filter=Q(expiry_date__lt=today)),
+            short_expired_qty=Sum(
+                "qty",
+                filter=Q(expiry_date__gte=today, expiry_date__lt=short_expiry_limit),
+            ),
+        )
+    }
+    ProductStockSummary.objects.bulk_create(
+        [
+            ProductStockSummary(
+                product_id=product_id,
+                live_qty=totals.get(product_id, {}).get("live_qty") or 0,
+                expired_qty=totals.get(product_id, {}).get("expired_qty") or 0,
+                short_expired_qty=totals.get(product_id, {}).get("short_expired_qty")
+                or 0,
+                as_of=today,
+            )
+            for product_id in Product.objects.values_list("id", flat=True)
+        ],
+        batch_size=500,
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("product", "0021_customertransaction_total_amount_and_more"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="ProductStockSummary",
+            fields=[
+                (
+                    "product",
+                    models.OneToOneField(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        primary_key=True,
+                        related_name="stock_summary",
+                        serialize=False,
+                        to="product.product",
+                    ),
+                ),
+                (
+                    "live_qty",
+                    models.IntegerField(
+                        default=0, help_text="Quantity in stocks that are not expired."
+                    ),
+                ),
+                (
+                    "expired_qty",
+                    models.IntegerField(
+                        default=0,
+                        help_text="Quantity in stocks that are already expired.",
+                    ),
+                ),
+                (
+                    "short_expired_qty",
+                    models.IntegerField(
+                        default=0,
+                        help_text="Quantity in stocks expiring within the short expiry window.",
+                    ),
+                ),
+                (
+                    "as_of",
+                    models.DateField(
+                        help_text="Day the expiry buckets were computed for."
+                    ),
+                ),
+                ("updated_at", models.DateTimeField(auto_now=True)),
+            ],
+            options={
+                "verbose_name_plural": "Product Stock Summaries",
+            },
+        ),
+        migrations.RunPython(populate_stock_summaries, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,30 @@
+# Generated by Django 5.0.6 on 2026-10-18 06:23
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+def clamp_negative_stock_qty(apps, schema_editor):
+    # Completing orders used to be able to oversell a batch; the constraint
+    # below can only be added once no row is negative.
+    Stock = apps.get_model("product", "Stock")
+    Stock.objects.filter(qty__lt=0).update(qty=0)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("core", "0006_remove_customer_balance_customer_credit_amount"),
+        ("product", "0022_productstocksummary"),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.RunPython(clamp_negative_stock_qty, migrations.RunPython.noop),
+        migrations.AddConstraint(
+            model_name="stock",
+            constraint=models.CheckConstraint(
+                check=models.Q(("qty__gte", 0)), name="product_stock_qty_non_negative"
+            ),
+        ),
+    ]
@@ -0,0 +1,58 @@
+# Generated by Django 5.0.6 on 2026-10-18 06:29
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("core", "0006_remove_customer_balance_customer_credit_amount"),
+        ("product", "0023_stock_qty_non_negative"),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.RemoveIndex(
+            model_name="stock",
+            name="product_sto_barcode_5d0c4d_idx",
+        ),
+        migrations.AddIndex(
+            model_name="order",
+            index=models.Index(
+                fields=["status", "created_at"], name="product_order_status_idx"
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="stock",
+            index=models.Index(
+                fields=["product", "expiry_date"], name="product_stock_prod_exp_idx"
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="stock",
+            index=models.Index(
+                condition=models.Q(("qty__gt", 0)),
+                fields=["product", "expiry_date"],
+                name="product_stock_live_prod_idx",
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="stock",
+            index=models.Index(
+                condition=models.Q(("qty__gt", 0)),
+                fields=["expiry_date"],
+                name="product_stock_live_exp_idx",
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="stock",
+            index=models.Index(fields=["entry_date"], name="product_stock_entry_idx"),
+        ),
+        migrations.AddIndex(
+            model_name="stockorder",
+            index=models.Index(
+                fields=["order", "stock"], name="product_stockorder_ord_idx"
+            ),
+        ),
+    ]
@@ -0,0 +1,45 @@
+from django.db import migrations
+
+
+def create_search_index(apps, schema_editor):
+    connection = schema_editor.connection
+    if connection.vendor == "postgresql":
+        # Django's icontains compiles to UPPER(name) LIKE UPPER(%s)
+        schema_editor.execute("CREATE EXTENSION IF NOT EXISTS pg_trgm")
+        schema_editor.execute(
+            "CREATE INDEX IF NOT EXISTS product_product_name_trgm_idx "
+            "ON product_product USING gin (UPPER(name) gin_trgm_ops)"
+        )
+    elif connection.vendor == "sqlite":
+        with connection.cursor() as cursor:
+            cursor.execute("SELECT sqlite_version()")
+            version = tuple(int(part) for part in cursor.fetchone()[0].split("."))
+        # The trigram tokenizer needs SQLite 3.34; search falls back to icontains
+        if version < (3, 34):
+            return
+        schema_editor.execute(
+            "CREATE VIRTUAL TABLE IF NOT EXISTS product_search "
+            "USING fts5(name, tokenize='trigram')"
+        )
+        schema_editor.execute(
+            "INSERT INTO product_search (rowid, name) "
+            "SELECT id, name FROM product_product"
+        )
+
+
+def drop_search_index(apps, schema_editor):
+    if schema_editor.connection.vendor == "postgresql":
+        schema_editor.execute("DROP INDEX IF EXISTS product_product_name_trgm_idx")
+    elif schema_editor.connection.vendor == "sqlite":
+        schema_editor.execute("DROP TABLE IF EXISTS product_search")
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("product", "0024_stock_order_access_path_indexes"),
+    ]
+
+    operations = [
+        migrations.RunPython(create_search_index, drop_search_index),
+    ]
@@ -0,0 +1,22 @@
+# Generated by Django 5.0.6 on 2026-10-18 06:54
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("core", "0007_company_updated_at_formula_updated_at"),
+        ("product", "0026_tombstone"),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name="order",
+            index=models.Index(
+                fields=["-created_at", "-id"], name="product_order_created_idx"
+            ),
+        ),
+    ]
@@ -1,7 +1,10 @@
 from django.db import models
 from pharmacy.core.models import Company, Formula, Distribution, Customer
 from .choices import ProductTypeChoices
-from django.db.models import Sum, Q
+from django.db import DEFAULT_DB_ALIAS, connections, router, transaction
+from django.db.models import Sum, Q, Value
+from django.db.models.functions import Coalesce
+from django.dispatch import Signal
 from django.utils import timezone
 from django.core.validators import MinValueValidator, MaxValueValidator
 from django.contrib.auth.models import User
@@ -9,7 +12,11 @@ from barcode import Code128
 from barcode.errors import BarcodeError
 from django.core.exceptions import ValidationError
 from datetime import date
-from pharmacy.config import LOW_QTY_THRESHOLD, MAX_DISCOUNT_PERCENTAGE
+from pharmacy.config import (
+    LOW_QTY_THRESHOLD,
+    MAX_DISCOUNT_PERCENTAGE,
+    SHORT_EXPIRY_DAYS,
+)
 from pharmacy.utills.enums import DiscrepancyTypeEnum, TransactionType, OrderStatusEnum
 
 
@@ -34,8 +41,26 @@ class Product(models.Model):
     description = models.TextField(null=True, blank=True)
     updated_at = models.DateTimeField(auto_now=True)
 
+    def _current_stock_summary(self):
+        # The rollup buckets are only valid for the day they were computed on
+        try:
+            summary = self.stock_summary
+        except ProductStockSummary.DoesNotExist:
+            return None
+        if summary.as_of != date.today():
+            return None
+        return summary
+
     @property
     def total_qty(self):
+        # Querysets may annotate the quantity in SQL (see ProductViewSet)
+        if "_total_qty" in self.__dict__:
+            return self._total_qty
+
+        summary = self._current_stock_summary()
+        if summary is not None:
+            return summary.live_qty
+
         # Get today's date
         today = date.today()
 
@@ -47,8 +72,16 @@ class Product(models.Model):
             or 0
         )
 
+    @total_qty.setter
+    def total_qty(self, value):
+        self._total_qty = value
+
     @property
     def total_qty_expired(self):
+        summary = self._current_stock_summary()
+        if summary is not None:
+            return summary.expired_qty
+
         # Get today's date
         today = date.today()
 
@@ -62,9 +95,13 @@ class Product(models.Model):
 
     @property
     def total_qty_short_expired(self):
+        summary = self._current_stock_summary()
+        if summary is not None:
+            return summary.short_expired_qty
+
         # Get today's date
         today = date.today()
-        six_months_later = today + timezone.timedelta(days=180)
+        six_months_later = today + timezone.timedelta(days=SHORT_EXPIRY_DAYS)
 
         # Include stocks where expiry_date is less than today's date
         return (
@@ -76,9 +113,13 @@ class Product(models.Model):
 
     @property
     def total_qty_expired_and_short_expired(self):
+        summary = self._current_stock_summary()
+        if summary is not None:
+            return summary.expired_qty + summary.short_expired_qty
+
         # Get today's date
         today = date.today()
-        six_months_later = today + timezone.timedelta(days=180)
+        six_months_later = today + timezone.timedelta(days=SHORT_EXPIRY_DAYS)
 
         # Include stocks where expiry_date is less than today's date
         return (
@@ -119,6 +160,73 @@ def validate_code128(barcode):
         raise ValidationError("Invalid Code128 barcode.")
 
 
+def allocate_stock_ids(count, using=DEFAULT_DB_ALIAS):
+    """
+    Reserve ``count`` primary keys for new stocks before they are inserted, so
+    their barcodes can be written with the row itself. Returns None on backends
+    that can't hand out ids up front.
+    """
+    connection = connections[using]
+    table = connection.ops.quote_name(Stock._meta.db_table)
+
+    with connection.cursor() as cursor:
+        if connection.vendor == "postgresql":
+            cursor.execute(
+                "SELECT nextval(pg_get_serial_sequence(%s, 'id')) "
+                "FROM generate_series(1, %s)",
+                [Stock._meta.db_table, count],
+            )
+            return [row[0] for row in cursor.fetchall()]
+
+        if connection.vendor == "sqlite":
+            # AUTOINCREMENT tables never reuse ids below sqlite_sequence.seq, so
+            # bumping it reserves the block. Writing first takes the lock up front.
+            with transaction.atomic(using=using):
+                cursor.execute(
+                    "UPDATE sqlite_sequence SET seq = MAX(seq, "
+                    f"(SELECT COALESCE(MAX(id), 0) FROM {table})) + %s "
+                    "WHERE name = %s",
+                    [count, Stock._meta.db_table],
+                )
+                if not cursor.rowcount:
+                    cursor.execute(
+                        "INSERT INTO sqlite_sequence (name, seq) "
+                        f"SELECT %s, COALESCE(MAX(id), 0) + %s FROM {table}",
+                        [Stock._meta.db_table, count],
+                    )
+                cursor.execute(
+                    "SELECT seq FROM sqlite_sequence WHERE name = %s",
+                    [Stock._meta.db_table],
+                )
+                last_id = cursor.fetchone()[0]
+            return list(range(last_id - count + 1, last_id + 1))
+
+    return None
+
+
+class StockManager(models.Manager):
+    def bulk_create(self, objs, *args, **kwargs):
+        objs = list(objs)
+        new_stocks = [stock for stock in objs if stock.pk is None and not stock.barcode]
+
+        ids = allocate_stock_ids(len(new_stocks), using=self.db) if new_stocks else None
+        if ids:
+            for stock, stock_id in zip(new_stocks, ids):
+                stock.pk = stock_id
+                stock.barcode = Stock.barcode_for(stock_id)
+
+        created = super().bulk_create(objs, *args, **kwargs)
+
+        if new_stocks and ids is None:
+            # Backends without id pre-allocation need a follow-up write
+            for stock in new_stocks:
+                stock.barcode = Stock.barcode_for(stock.pk)
+            self.bulk_update(new_stocks, ["barcode"])
+
+        ProductStockSummary.refresh({stock.product_id for stock in objs})
+        return created
+
+
 class Stock(models.Model):
     barcode = models.CharField(
         max_length=128,
@@ -150,6 +258,15 @@ class Stock(models.Model):
         help_text="User who recorded the stocks.",
     )
 
+    # Product the row was loaded with, used to refresh both sides of a move
+    _loaded_product_id = None
+
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instance = super().from_db(db, field_names, values)
+        instance._loaded_product_id = instance.__dict__.get("product_id")
+        return instance
+
     @property
     def total_price(self):
         return self.qty * self.price_per_unit
@@ -166,21 +283,182 @@ class Stock(models.Model):
     def total_profit_percent(self):
         return (self.expected_profit / self.total_purchase_price) * 100
 
+    objects = StockManager()
+
+    @staticmethod
+    def barcode_for(stock_id):
+        return Code128(str(stock_id)).get_fullcode()
+
     def save(self, *args, **kwargs):
+        if self._state.adding and self.pk is None and not self.barcode:
+            using = kwargs.get("using") or router.db_for_write(Stock, instance=self)
+            ids = allocate_stock_ids(1, using=using)
+            if ids:
+                self.pk = ids[0]
+                self.barcode = self.barcode_for(self.pk)
+                kwargs["force_insert"] = True
+
         super().save(*args, **kwargs)
 
         if not self.barcode:
-            self.barcode = Code128(str(self.id)).get_fullcode()
-            super().save(*args, **kwargs)
+            self.barcode = self.barcode_for(self.id)
+            super().save(update_fields=["barcode"])
 
     class Meta:
         ordering = ["-entry_date"]
-        indexes = [models.Index(fields=["barcode"])]
+        # barcode needs no index of its own, its unique constraint provides one
+        indexes = [
+            models.Index(
+                fields=["product", "expiry_date"], name="product_stock_prod_exp_idx"
+            ),
+            models.Index(
+                fields=["product", "expiry_date"],
+                condition=Q(qty__gt=0),
+                name="product_stock_live_prod_idx",
+            ),
+            models.Index(
+                fields=["expiry_date"],
+                condition=Q(qty__gt=0),
+                name="product_stock_live_exp_idx",
+            ),
+            models.Index(fields=["entry_date"], name="product_stock_entry_idx"),
+        ]
+        constraints = [
+            models.CheckConstraint(
+                check=Q(qty__gte=0), name="product_stock_qty_non_negative"
+            )
+        ]
 
     def __str__(self):
         return f"{self.id} - {self.product.name} - {self.qty}"
 
 
+# Sent with the affected product_ids whenever their stock levels are recomputed
+stock_levels_changed = Signal()
+
+
+class ProductStockSummary(models.Model):
+    """
+    Materialized per-product stock levels so listings don't aggregate stocks per row.
+
+    Rows are refreshed whenever the stocks of a product change and rebuilt nightly
+    by the ``rebuild_stock_summary`` command, which rolls the expiry buckets forward.
+    """
+
+    product = models.OneToOneField(
+        Product,
+        on_delete=models.CASCADE,
+        primary_key=True,
+        related_name="stock_summary",
+    )
+    live_qty = models.IntegerField(
+        default=0, help_text="Quantity in stocks that are not expired."
+    )
+    expired_qty = models.IntegerField(
+        default=0, help_text="Quantity in stocks that are already expired."
+    )
+    short_expired_qty = models.IntegerField(
+        default=0,
+        help_text="Quantity in stocks expiring within the short expiry window.",
+    )
+    as_of = models.DateField(help_text="Day the expiry buckets were computed for.")
+    updated_at = models.DateTimeField(auto_now=True)
+
+    @classmethod
+    def refresh(cls, product_ids, today=None):
+        product_ids = set(product_ids)
+        if not product_ids:
+            return
+
+        today = today or date.today()
+        short_expiry_limit = today + timezone.timedelta(days=SHORT_EXPIRY_DAYS)
+
+        with transaction.atomic():
+            # Lock the existing rows so concurrent refreshes of a product serialize
+            list(
+                cls.objects.select_for_update()
+                .filter(product_id__in=product_ids)
+                .values_list("pk", flat=True)
+            )
+            totals = {
+                row["product_id"]: row
+                for row in Stock.objects.filter(product_id__in=product_ids)
+                .values("product_id")
+                .annotate(
+                    live_qty=Coalesce(
+                        Sum(
+                            "qty",
+                            filter=Q(expiry_date__gte=today)
+                            | Q(expiry_date__isnull=True),
+                        ),
+                        Value(0),
+                    ),
+                    expired_qty=Coalesce(
+                        Sum("qty", filter=Q(expiry_date__lt=today)), Value(0)
+                    ),
+                    short_expired_qty=Coalesce(
+                        Sum(
+                            "qty",
+                            filter=Q(
+                                expiry_date__gte=today,
+                                expiry_date__lt=short_expiry_limit,
+                            ),
+                        ),
+                        Value(0),
+                    ),
+                )
+            }
+            existing_product_ids = Product.objects.filter(
+                id__in=product_ids
+            ).values_list("id", flat=True)
+
+            summaries = []
+            for product_id in existing_product_ids:
+                row = totals.get(product_id, {})
+                summaries.append(
+                    cls(
+                        product_id=product_id,
+                        live_qty=row.get("live_qty", 0),
+                        expired_qty=row.get("expired_qty", 0),
+                        short_expired_qty=row.get("short_expired_qty", 0),
+                        as_of=today,
+                    )
+                )
+            cls.objects.bulk_create(
+                summaries,
+                update_conflicts=True,
+                unique_fields=["product"],
+                update_fields=[
+                    "live_qty",
+                    "expired_qty",
+                    "short_expired_qty",
+                    "as_of",
+                    "updated_at",
+                ],
+            )
+
+        stock_levels_changed.send(sender=cls, product_ids=product_ids)
+
+    class Meta:
+        verbose_name_plural = "Product Stock Summaries"
+
+    def __str__(self):
+        return f"{self.product_id} - {self.live_qty} ({self.as_of})"
+
+
+class Tombstone(models.Model):
+    """
+    Marks a deleted catalog row, so terminals syncing with /sync/ drop it too.
+    """
+
+    model = models.CharField(max_length=32)
+    object_id = models.BigIntegerField()
+    deleted_at = models.DateTimeField(auto_now_add=True, db_index=True)
+
+    def __str__(self):
+        return f"{self.model} {self.object_id} deleted at {self.deleted_at}"
+
+
 class Order(models.Model):
     customer = models.ForeignKey(
         Customer, related_name="orders", on_delete=models.SET_NULL, null=True
@@ -266,6 +544,15 @@ class Order(models.Model):
 
     class Meta:
         ordering = ["-created_at"]
+        indexes = [
+            models.Index(
+                fields=["status", "created_at"], name="product_order_status_idx"
+            ),
+            # Keyset pagination of the order list seeks on (created_at, id)
+            models.Index(
+                fields=["-created_at", "-id"], name="product_order_created_idx"
+            ),
+        ]
 
     def __str__(self):
         return f"{self.stocks}"
@@ -280,6 +567,11 @@ class StockOrder(models.Model):
     )
     quantity = models.IntegerField(validators=[MinValueValidator(1)])
 
+    class Meta:
+        indexes = [
+            models.Index(fields=["order", "stock"], name="product_stockorder_ord_idx")
+        ]
+
     # def save(self, *args, **kwargs):
     #     if self.pk:
     #         # If updating an existing StockOrder, adjust the stock quantity accordingly
@@ -1,14 +1,99 @@
+import base64
+import datetime
+import decimal
+import hashlib
+import json
+
+from django.core.cache import cache
+from django.core.exceptions import FieldDoesNotExist
+from django.core.paginator import Paginator
+from django.db import connections
+from django.db.models import F, Q
+from django.utils.functional import cached_property
+from pharmacy.config import LIST_COUNT_CACHE_TIMEOUT
+from pharmacy.utills.cache import get_cache_version
+from rest_framework.exceptions import NotFound
 from rest_framework.pagination import PageNumberPagination
 from rest_framework.response import Response
 
 
+def encode_cursor_value(value):
+    # Keeps full microsecond precision, unlike DjangoJSONEncoder
+    if isinstance(value, (datetime.date, datetime.time)):
+        return value.isoformat()
+    if isinstance(value, decimal.Decimal):
+        return str(value)
+    raise TypeError(f"Cannot use {type(value).__name__} in a cursor")
+
+
+# Bumped by product/signals.py whenever products or stocks change
+COUNT_CACHE_NAMESPACE = "list-counts"
+
+
+def estimate_count(queryset):
+    """Row estimate from the PostgreSQL planner, or None where unavailable."""
+    if connections[queryset.db].vendor != "postgresql":
+        return None
+    plan = json.loads(queryset.explain(format="json"))
+    return int(plan[0]["Plan"]["Plan Rows"])
+
+
+class CountCachingPaginator(Paginator):
+    def __init__(self, object_list, per_page, count_key=None, estimate=False):
+        super().__init__(object_list, per_page)
+        self.count_key = count_key
+        self.estimate = estimate
+        self.count_is_estimate = False
+
+    @cached_property
+    def count(self):
+        if self.estimate:
+            count = estimate_count(self.object_list)
+            if count is not None:
+                self.count_is_estimate = True
+                return count
+
+        if self.count_key is None:
+            return self.object_list.count()
+
+        count = cache.get(self.count_key)
+        if count is None:
+            count = self.object_list.count()
+            cache.set(self.count_key, count, LIST_COUNT_CACHE_TIMEOUT)
+        return count
+
+
 class CustomPagination(PageNumberPagination):
     page_size = 20
     page_size_query_param = "perPage"
     page_query_param = "page"
     max_page_size = 100
+    # Opt-in keyset pagination, e.g. ?cursor= for the first page
+    cursor_query_param = "cursor"
+    cursor_by_default = False
+    # ?count=estimate uses planner statistics, ?count=exact forces a count in
+    # cursor mode (which skips counting by default)
+    count_query_param = "count"
+    # Parameters that don't change which rows match
+    count_ignored_params = ["page", "perPage", "cursor", "count", "ordering"]
 
     def paginate_queryset(self, queryset, request, view=None):
+        self.count_mode = request.query_params.get(self.count_query_param)
+        self.django_paginator_class = lambda object_list, per_page: (
+            CountCachingPaginator(
+                object_list,
+                per_page,
+                count_key=self.get_count_cache_key(request, view),
+                estimate=self.count_mode == "estimate",
+            )
+        )
+
+        self.cursor_mode = (
+            self.cursor_by_default or self.cursor_query_param in request.query_params
+        )
+        if self.cursor_mode:
+            return self.paginate_queryset_by_cursor(queryset, request)
+
         # Set default page to 1 if not provided
         if not request.query_params.get(self.page_query_param):
             request.query_params._mutable = True
@@ -18,11 +103,169 @@ class CustomPagination(PageNumberPagination):
         return super().paginate_queryset(queryset, request, view)
 
     def get_paginated_response(self, data):
+        if self.cursor_mode:
+            return Response(
+                {
+                    "total_count": self.cursor_count,
+                    "current_page": None,
+                    "has_next_page": self.next_cursor is not None,
+                    "next_cursor": self.next_cursor,
+                    "results": data,
+                    **self.get_count_flags(self.cursor_paginator),
+                }
+            )
+
         return Response(
             {
                 "total_count": self.page.paginator.count,
                 "current_page": self.page.number,
                 "has_next_page": self.page.has_next(),
                 "results": data,
+                **self.get_count_flags(self.page.paginator),
             }
         )
+
+    def get_count_flags(self, paginator):
+        if paginator is not None and paginator.count_is_estimate:
+            return {"total_count_is_estimate": True}
+        return {}
+
+    def get_count_cache_key(self, request, view):
+        if view is None:
+            return None
+        params = sorted(
+            (key, value)
+            for key, values in request.query_params.lists()
+            if key not in self.count_ignored_params
+            for value in values
+        )
+        digest = hashlib.md5(json.dumps(params).encode()).hexdigest()
+        version = get_cache_version(COUNT_CACHE_NAMESPACE)
+        return f"{COUNT_CACHE_NAMESPACE}:{version}:{view.__class__.__name__}:{digest}"
+
+    def paginate_queryset_by_cursor(self, queryset, request):
+        """
+        Seek past the last row of the previous page instead of using OFFSET and
+        COUNT, keyed on the queryset's ordering plus ``id`` as a tie-breaker.
+        """
+        page_size = self.get_page_size(request)
+
+        # Counting is optional in cursor mode
+        self.cursor_paginator = None
+        self.cursor_count = None
+        if self.count_mode in ["estimate", "exact"]:
+            self.cursor_paginator = self.django_paginator_class(queryset, page_size)
+            self.cursor_count = self.cursor_paginator.count
+
+        keys = self.get_keyset(queryset)
+        queryset = queryset.order_by(
+            *[
+                (F(name).desc if descending else F(name).asc)(
+                    nulls_last=True if nullable else None
+                )
+                for name, descending, nullable in keys
+            ]
+        )
+
+        cursor = request.query_params.get(self.cursor_query_param)
+        if cursor:
+            position = self.decode_cursor(cursor)
+            if len(position) != len(keys):
+                raise NotFound("Invalid cursor.")
+            queryset = queryset.filter(self.keyset_after(keys, position))
+
+        rows = list(queryset[: page_size + 1])
+        self.next_cursor = None
+        if len(rows) > page_size:
+            rows = rows[:page_size]
+            self.next_cursor = self.encode_cursor(
+                [self.get_key_value(rows[-1], name) for name, _, _ in keys]
+            )
+        return rows
+
+    def get_keyset(self, queryset):
+        model = queryset.model
+        ordering = queryset.query.order_by or model._meta.ordering
+        keys = []
+        for item in ordering:
+            if not isinstance(item, str):
+                continue
+            descending = item.startswith("-")
+            name = item.lstrip("-")
+            if name == "pk":
+                name = "id"
+            column, nullable = self.resolve_key(model, name)
+            keys.append((column, descending, nullable))
+
+        if "id" not in [name for name, _, _ in keys]:
+            keys.append(("id", keys[0][1] if keys else False, False))
+        return keys
+
+    @staticmethod
+    def resolve_key(model, name):
+        """Returns the column to seek on and whether it can hold NULLs."""
+        if "__" in name:
+            return name, True
+        try:
+            field = model._meta.get_field(name)
+        except FieldDoesNotExist:
+            # Annotations such as ProductViewSet's total_qty
+            return name, True
+        if field.many_to_one:
+            return field.attname, field.null
+        return name, field.null
+
+    @staticmethod
+    def keyset_after(keys, position):
+        # (a, b, id) > (va, vb, vid) spelled out for mixed directions, with
+        # NULLs sorted last in either direction
+        condition = Q(pk__in=[])
+        equal_so_far = Q()
+        for (name, descending, nullable), value in zip(keys, position):
+            if value is None:
+                after = Q(pk__in=[])
+                equal = Q(**{f"{name}__isnull": True})
+            else:
+                after = Q(**{f"{name}__{'lt' if descending else 'gt'}": value})
+                if nullable:
+                    after |= Q(**{f"{name}__isnull": True})
+                equal = Q(**{name: value})
+            condition |= equal_so_far & after
+            equal_so_far &= equal
+        return condition
+
+    @staticmethod
+    def get_key_value(obj, name):
+        for attribute in name.split("__"):
+            if obj is None:
+                return None
+            obj = getattr(obj, attribute)
+        return obj
+
+    @staticmethod
+    def encode_cursor(values):
+        payload = json.dumps(values, default=encode_cursor_value).encode()
+        return base64.urlsafe_b64encode(payload).decode()
+
+    @staticmethod
+    def decode_cursor(cursor):
+        try:
+            values = json.loads(base64.urlsafe_b64decode(cursor.encode()))
+        except (TypeError, ValueError):
+            raise NotFound("Invalid cursor.")
+        if not isinstance(values, list):
+            raise NotFound("Invalid cursor.")
+        return values
+
+
+class OrderPagination(CustomPagination):
+    """
+    Keyset pagination by default, as OFFSET pages get slower the further back
+    the sales history goes. Order counts aren't cached, they change with every
+    sale.
+    """
+
+    cursor_by_default = True
+
+    def get_count_cache_key(self, request, view):
+        return None
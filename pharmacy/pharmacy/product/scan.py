@@ -0,0 +1,52 @@
+"""
+Barcode lookups for checkout, cached until the next stock or product change.
+"""
+
+from django.core.cache import cache
+from pharmacy.config import STOCK_SCAN_CACHE_TIMEOUT
+from pharmacy.utills.cache import get_cache_version
+from .models import Stock
+
+# Bumped by product/signals.py whenever stocks or products change
+STOCK_SCAN_CACHE_NAMESPACE = "stock-scan"
+
+SCAN_FIELDS = {
+    "id": "id",
+    "barcode": "barcode",
+    "qty": "qty",
+    "price_per_unit": "price_per_unit",
+    "expiry_date": "expiry_date",
+}
+SCAN_PRODUCT_FIELDS = {
+    "id": "product_id",
+    "name": "product__name",
+    "product_type": "product__product_type",
+    "per_pack": "product__per_pack",
+}
+
+
+def scan_stock(barcode):
+    """
+    Compact stock and product payload for a scanned barcode, or None if no stock
+    carries it. Hits the barcode's unique index at most once per cache version.
+    """
+    version = get_cache_version(STOCK_SCAN_CACHE_NAMESPACE)
+    key = f"{STOCK_SCAN_CACHE_NAMESPACE}:{version}:{barcode}"
+    payload = cache.get(key)
+    if payload is not None:
+        return payload
+
+    row = (
+        Stock.objects.filter(barcode=barcode)
+        .values(*SCAN_FIELDS.values(), *SCAN_PRODUCT_FIELDS.values())
+        .first()
+    )
+    if row is None:
+        return None
+
+    payload = {name: row[field] for name, field in SCAN_FIELDS.items()}
+    payload["product"] = {
+        name: row[field] for name, field in SCAN_PRODUCT_FIELDS.items()
+    }
+    cache.set(key, payload, STOCK_SCAN_CACHE_TIMEOUT)
+    return payload
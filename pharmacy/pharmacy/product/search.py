@@ -0,0 +1,125 @@
+"""
+Ranked product name search.
+
+PostgreSQL matches through a pg_trgm GIN index on UPPER(name), the expression
+Django's icontains compiles to, and ranks by trigram similarity. SQLite keeps the
+``product_search`` FTS5 table (trigram tokenizer) in sync through signals and
+ranks prefix and early matches first. Anything else falls back to a plain icontains.
+"""
+
+from django.db import connections
+from django.db.models import ExpressionWrapper, IntegerField, Value
+from django.db.models.expressions import RawSQL
+from django.db.models.functions import Coalesce, Length, Lower, NullIf, StrIndex
+
+FTS_TABLE = "product_search"
+# The trigram tokenizer can't match anything shorter than one trigram
+FTS_MIN_TERM_LENGTH = 3
+
+_fts_tables = {}
+
+
+def has_fts_table(connection):
+    if connection.alias not in _fts_tables:
+        with connection.cursor() as cursor:
+            cursor.execute(
+                "SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = %s",
+                [FTS_TABLE],
+            )
+            _fts_tables[connection.alias] = cursor.fetchone() is not None
+    return _fts_tables[connection.alias]
+
+
+def _fts_connection(using):
+    connection = connections[using]
+    if connection.vendor == "sqlite" and has_fts_table(connection):
+        return connection
+    return None
+
+
+def index_product(product, using="default"):
+    connection = _fts_connection(using)
+    if connection is None:
+        return
+    with connection.cursor() as cursor:
+        cursor.execute(f"DELETE FROM {FTS_TABLE} WHERE rowid = %s", [product.pk])
+        cursor.execute(
+            f"INSERT INTO {FTS_TABLE} (rowid, name) VALUES (%s, %s)",
+            [product.pk, product.name],
+        )
+
+
+def remove_product(product_id, using="default"):
+    connection = _fts_connection(using)
+    if connection is None:
+        return
+    with connection.cursor() as cursor:
+        cursor.execute(f"DELETE FROM {FTS_TABLE} WHERE rowid = %s", [product_id])
+
+
+def rebuild_index(using="default"):
+    """Refill the FTS table, e.g. after products were written in bulk."""
+    connection = _fts_connection(using)
+    if connection is None:
+        return
+    with connection.cursor() as cursor:
+        cursor.execute(f"DELETE FROM {FTS_TABLE}")
+        cursor.execute(
+            f"INSERT INTO {FTS_TABLE} (rowid, name) SELECT id, name FROM product_product"
+        )
+
+
+def _fts_matches(term):
+    """Subquery of the ids of every product whose name contains ``term``."""
+    match = '"' + term.replace('"', '""') + '"'
+    return RawSQL(f"SELECT rowid FROM {FTS_TABLE} WHERE {FTS_TABLE} MATCH %s", [match])
+
+
+def _name_rank(name_field, term):
+    """
+    Prefix matches first, then earlier and closer (shorter) matches, as one
+    integer so keyset pagination can seek on it. Names are at most 255 long.
+    """
+    position = Coalesce(
+        NullIf(StrIndex(Lower(name_field), Lower(Value(term))), 0),
+        # Matched by the FTS table's case folding but not by SQL lower()
+        Value(256),
+    )
+    return ExpressionWrapper(
+        position * 256 + Length(name_field), output_field=IntegerField()
+    )
+
+
+def search_products(queryset, term, product_field="pk", name_field="name", rank=True):
+    """
+    Narrow ``queryset`` to rows whose product name contains ``term``. With
+    ``rank`` the rows are ordered by relevance through a ``search_rank``
+    annotation, so keyset pagination can still page through them.
+    """
+    term = term.strip()
+    if not term:
+        return queryset
+
+    connection = connections[queryset.db]
+
+    if connection.vendor == "postgresql":
+        from django.contrib.postgres.search import TrigramSimilarity
+
+        queryset = queryset.filter(**{f"{name_field}__icontains": term})
+        if rank:
+            queryset = queryset.annotate(
+                search_rank=TrigramSimilarity(name_field, term)
+            ).order_by("-search_rank", "pk")
+        return queryset
+
+    if len(term) >= FTS_MIN_TERM_LENGTH and _fts_connection(queryset.db):
+        # No limit on the matches: the view's other filters and the pagination
+        # narrow them down, and ranking happens in the same query
+        queryset = queryset.filter(**{f"{product_field}__in": _fts_matches(term)})
+        if rank:
+            queryset = queryset.annotate(
+                search_rank=_name_rank(name_field, term)
+            ).order_by("search_rank", name_field, "pk")
+        return queryset
+
+    return queryset.filter(**{f"{name_field}__icontains": term})
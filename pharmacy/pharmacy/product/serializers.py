@@ -1,5 +1,7 @@
+from collections import defaultdict
 from rest_framework import serializers
-from .models import Product, Stock, StockOrder, Order
+from django.db import transaction
+from .models import Product, Stock, StockOrder, Order, validate_code128
 from pharmacy.core.models import Company, Distribution, Formula
 from pharmacy.core.serializers import (
     CompanySerializer,
@@ -10,6 +12,7 @@ from django.db.models import Sum
 from pharmacy.core.serializers import CustomerSerializer
 from .. import config
 from pharmacy.user.serializers import UserSerializer
+from pharmacy.utills.serializers import SparseFieldsetMixin
 
 
 class ProductSerializer(serializers.ModelSerializer):
@@ -26,18 +29,113 @@ class StockSerializer(serializers.ModelSerializer):
 
 
 class StockWithDistName(StockSerializer):
-    def to_representation(self, instance):
-        data = super().to_representation(instance)
-        data["bought_from"] = instance.bought_from.name
-        return data
+    # Reads the relation loaded by the caller's select_related, None if unset
+    bought_from = serializers.CharField(source="bought_from.name", read_only=True)
 
 
-class StockCRUDSerializer(StockSerializer):
+class StockCRUDSerializer(SparseFieldsetMixin, StockSerializer):
     product = ProductSerializer(read_only=True)
     bought_from = DistributionSerializer(read_only=True)
 
 
-class ProductDetailSerializer(serializers.ModelSerializer):
+class StockListSerializer(SparseFieldsetMixin, serializers.ModelSerializer):
+    # Flat by default, ?expand=product,bought_from nests the related objects
+    product_name = serializers.CharField(source="product.name", read_only=True)
+    bought_from_name = serializers.CharField(source="bought_from.name", read_only=True)
+
+    expandable_fields = {
+        "product": (ProductSerializer, {}),
+        "bought_from": (DistributionSerializer, {}),
+    }
+
+    class Meta:
+        model = Stock
+        fields = [
+            "id",
+            "barcode",
+            "qty",
+            "price_per_unit",
+            "purchase_price",
+            "expiry_date",
+            "entry_date",
+            "updated_at",
+            "product",
+            "product_name",
+            "bought_from",
+            "bought_from_name",
+            "added_by",
+        ]
+
+
+class StockBulkLineSerializer(serializers.Serializer):
+    # Products are resolved for all lines at once by StockBulkCreateSerializer
+    product = serializers.IntegerField(min_value=1)
+    qty = serializers.IntegerField(min_value=0)
+    price_per_unit = serializers.FloatField()
+    purchase_price = serializers.DecimalField(max_digits=10, decimal_places=2)
+    expiry_date = serializers.DateField(required=False, allow_null=True)
+    barcode = serializers.CharField(
+        max_length=128,
+        required=False,
+        allow_null=True,
+        allow_blank=True,
+        validators=[validate_code128],
+    )
+
+
+class StockBulkCreateSerializer(serializers.Serializer):
+    bought_from = serializers.PrimaryKeyRelatedField(
+        queryset=Distribution.objects.all()
+    )
+    stocks = StockBulkLineSerializer(many=True, allow_empty=False)
+
+    def validate(self, attrs):
+        lines = attrs["stocks"]
+        products = Product.objects.in_bulk({line["product"] for line in lines})
+        barcodes = [line["barcode"] for line in lines if line.get("barcode")]
+        taken_barcodes = set(
+            Stock.objects.filter(barcode__in=barcodes).values_list("barcode", flat=True)
+        )
+
+        errors = {}
+        for index, line in enumerate(lines):
+            line_errors = {}
+            if line["product"] not in products:
+                line_errors["product"] = "Product not found."
+            barcode = line.get("barcode")
+            if barcode:
+                if barcode in taken_barcodes:
+                    line_errors["barcode"] = "Stock with this barcode already exists."
+                taken_barcodes.add(barcode)
+            if line_errors:
+                errors[index] = line_errors
+        if errors:
+            raise serializers.ValidationError({"stocks": errors})
+
+        attrs["products"] = products
+        return attrs
+
+    def create(self, validated_data):
+        products = validated_data["products"]
+        stocks = [
+            Stock(
+                product=products[line["product"]],
+                qty=line["qty"],
+                price_per_unit=line["price_per_unit"],
+                purchase_price=line["purchase_price"],
+                expiry_date=line.get("expiry_date"),
+                barcode=line.get("barcode") or None,
+                bought_from=validated_data["bought_from"],
+                added_by=validated_data.get("added_by"),
+            )
+            for line in validated_data["stocks"]
+        ]
+        with transaction.atomic():
+            Stock.objects.bulk_create(stocks)
+        return stocks
+
+
+class ProductDetailSerializer(SparseFieldsetMixin, serializers.ModelSerializer):
     company_id = serializers.PrimaryKeyRelatedField(
         queryset=Company.objects.all(), source="company", write_only=True
     )
@@ -69,17 +167,52 @@ class ProductDetailSerializer(serializers.ModelSerializer):
         }
 
 
-class StockOrderSerializer(serializers.ModelSerializer):
+class ProductListSerializer(SparseFieldsetMixin, serializers.ModelSerializer):
+    # Flat by default, ?expand=company,distribution,formula,stocks nests them
+    company_name = serializers.CharField(source="company.name", read_only=True)
+    distribution_name = serializers.CharField(
+        source="distribution.name", read_only=True
+    )
+    formula_name = serializers.CharField(source="formula.name", read_only=True)
+    total_qty = serializers.IntegerField(read_only=True)
+
+    expandable_fields = {
+        "company": (CompanySerializer, {}),
+        "distribution": (DistributionSerializer, {}),
+        "formula": (FormulaSerializer, {}),
+        "stocks": (StockWithDistName, {"many": True}),
+    }
+
     class Meta:
-        model = StockOrder
-        fields = "__all__"
+        model = Product
+        fields = [
+            "id",
+            "name",
+            "product_type",
+            "avg_qty",
+            "per_pack",
+            "market_item",
+            "company",
+            "company_name",
+            "distribution",
+            "distribution_name",
+            "formula",
+            "formula_name",
+            "total_qty",
+            "updated_at",
+        ]
 
 
-class CreateStockOrder(serializers.ModelSerializer):
+class StockOrderSerializer(serializers.ModelSerializer):
     class Meta:
         model = StockOrder
         fields = "__all__"
-        extra_kwargs = {"order": {"required": False}}
+
+
+class CreateStockOrder(serializers.Serializer):
+    # Stocks are resolved in bulk by OrderCreateSerializer rather than per line
+    stock = serializers.IntegerField(min_value=1)
+    quantity = serializers.IntegerField(min_value=1)
 
 
 # class StockOrderSerializer(serializers.ModelSerializer):
@@ -141,30 +274,40 @@ class OrderCreateSerializer(serializers.ModelSerializer):
     def create(self, validated_data):
         try:
             stock_orders_data = validated_data.pop("stock_orders")
-            total_amount = 0
-            # Create the order and save it
-            order = Order.objects.create(total_amount=total_amount, **validated_data)
+            if not stock_orders_data:
+                raise serializers.ValidationError("Order must contain stocks")
 
-            # Process each stock order and update stock quantities
+            requested_qty = defaultdict(int)
             for stock_order_data in stock_orders_data:
-                stock: Stock = stock_order_data["stock"]
-                quantity: int = stock_order_data["quantity"]
+                requested_qty[stock_order_data["stock"]] += stock_order_data["quantity"]
+
+            # Lock every referenced stock in one query, in a deterministic order
+            stocks = (
+                Stock.objects.select_for_update(of=("self",))
+                .select_related("product")
+                .filter(id__in=requested_qty)
+                .order_by("id")
+                .in_bulk()
+            )
+            missing_ids = sorted(set(requested_qty) - set(stocks))
+            if missing_ids:
+                raise serializers.ValidationError(
+                    f"Stocks not found: {', '.join(map(str, missing_ids))}"
+                )
 
-                # Ensure there's enough stock
+            # Ensure there's enough stock
+            for stock_id, quantity in requested_qty.items():
+                stock: Stock = stocks[stock_id]
                 if quantity > stock.qty or stock.qty <= 0:
                     raise serializers.ValidationError(
                         f"Not enough stock for product: {stock.product.name}"
                     )
 
-                # # Decrement the stock quantity
-                # stock.qty -= quantity
-                # stock.save()  # Save the updated stock
-
-                # Create StockOrder and save it
-                StockOrder.objects.create(order=order, **stock_order_data)
-
-                # Update the total amount for the order
-                total_amount += quantity * stock.price_per_unit
+            total_amount = sum(
+                stock_order_data["quantity"]
+                * stocks[stock_order_data["stock"]].price_per_unit
+                for stock_order_data in stock_orders_data
+            )
 
             # Validate total_after_disc
             if validated_data.get("total_after_disc"):
@@ -180,9 +323,17 @@ class OrderCreateSerializer(serializers.ModelSerializer):
                         f"Total after discount cannot be less than {min_after_disc}"
                     )
 
-            # Update the total amount for the order
-            order.total_amount = total_amount
-            order.save()  # Save the order with the updated total amount
+            order = Order.objects.create(total_amount=total_amount, **validated_data)
+            StockOrder.objects.bulk_create(
+                [
+                    StockOrder(
+                        order=order,
+                        stock=stocks[stock_order_data["stock"]],
+                        quantity=stock_order_data["quantity"],
+                    )
+                    for stock_order_data in stock_orders_data
+                ]
+            )
 
             return order
 
@@ -203,7 +354,7 @@ class StockOrderDetailSerializer(serializers.ModelSerializer):
         exclude = ["order"]
 
 
-class OrderDetailSerializer(serializers.ModelSerializer):
+class OrderDetailSerializer(SparseFieldsetMixin, serializers.ModelSerializer):
     customer = CustomerSerializer()
     stock_orders = StockOrderDetailSerializer(many=True)
     created_by = UserSerializer()
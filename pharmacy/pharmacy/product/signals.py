@@ -0,0 +1,116 @@
+from django.db import transaction
+from django.db.models import QuerySet
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+from pharmacy.core.models import Company, Distribution, Formula
+from pharmacy.utills.cache import bump_cache_version_on_commit
+from .models import (
+    InventoryDiscrepancy,
+    Product,
+    ProductStockSummary,
+    Stock,
+    Tombstone,
+    stock_levels_changed,
+)
+from .paginations import COUNT_CACHE_NAMESPACE
+from .scan import STOCK_SCAN_CACHE_NAMESPACE
+from .sync import SYNC_MODEL_NAMES
+from . import search
+from .autocomplete import product_index
+
+
+def _is_product_deletion(origin):
+    if isinstance(origin, QuerySet):
+        return origin.model is Product
+    return isinstance(origin, Product)
+
+
+@receiver(post_save, sender=Product)
+def create_stock_summary(sender, instance: Product, created, raw=False, **kwargs):
+    if created and not raw:
+        ProductStockSummary.refresh([instance.pk])
+
+
+@receiver(post_save, sender=Stock)
+def refresh_summary_on_stock_save(sender, instance: Stock, raw=False, **kwargs):
+    if raw:
+        return
+    product_ids = {instance.product_id}
+    # A stock moved to another product changes the levels of both products
+    if instance._loaded_product_id:
+        product_ids.add(instance._loaded_product_id)
+    instance._loaded_product_id = instance.product_id
+    ProductStockSummary.refresh(product_ids)
+
+
+@receiver(post_delete, sender=Stock)
+def refresh_summary_on_stock_delete(sender, instance: Stock, origin=None, **kwargs):
+    # The summary row is removed together with the product itself
+    if _is_product_deletion(origin):
+        return
+    ProductStockSummary.refresh([instance.product_id])
+
+
+@receiver(post_save, sender=InventoryDiscrepancy)
+def refresh_summary_on_discrepancy(
+    sender, instance: InventoryDiscrepancy, raw=False, **kwargs
+):
+    if instance.stock_id and not raw:
+        ProductStockSummary.refresh([instance.stock.product_id])
+
+
+@receiver(post_save, sender=Product)
+@receiver(post_delete, sender=Product)
+@receiver(post_delete, sender=Company)
+@receiver(post_delete, sender=Formula)
+@receiver(post_delete, sender=Distribution)
+@receiver(stock_levels_changed)
+def invalidate_list_counts(sender, using=None, **kwargs):
+    bump_cache_version_on_commit(COUNT_CACHE_NAMESPACE, using=using)
+
+
+@receiver(post_save, sender=Product)
+@receiver(post_delete, sender=Product)
+@receiver(post_save, sender=Stock)
+@receiver(post_delete, sender=Stock)
+@receiver(stock_levels_changed)
+def invalidate_stock_scans(sender, using=None, **kwargs):
+    bump_cache_version_on_commit(STOCK_SCAN_CACHE_NAMESPACE, using=using)
+
+
+@receiver(post_save, sender=Product)
+def index_product_search(sender, instance: Product, using, raw=False, **kwargs):
+    search.index_product(instance, using=using)
+
+
+@receiver(post_delete, sender=Product)
+def remove_product_search(sender, instance: Product, using, **kwargs):
+    search.remove_product(instance.pk, using=using)
+
+
+# The autocomplete index lives in memory, so only committed changes go into it
+
+
+@receiver(post_save, sender=Product)
+@receiver(post_delete, sender=Product)
+@receiver(stock_levels_changed)
+def update_autocomplete_index(sender, instance=None, product_ids=None, **kwargs):
+    product_ids = list(product_ids or [instance.pk])
+    transaction.on_commit(lambda: product_index.update_products(product_ids))
+
+
+@receiver(post_save, sender=Formula)
+def update_autocomplete_formula(sender, instance: Formula, **kwargs):
+    product_ids = list(instance.products.values_list("id", flat=True))
+    transaction.on_commit(lambda: product_index.update_products(product_ids))
+
+
+@receiver(post_delete, sender=Product)
+@receiver(post_delete, sender=Stock)
+@receiver(post_delete, sender=Company)
+@receiver(post_delete, sender=Formula)
+@receiver(post_delete, sender=Distribution)
+def record_tombstone(sender, instance, using, **kwargs):
+    Tombstone.objects.using(using).create(
+        model=SYNC_MODEL_NAMES[sender], object_id=instance.pk
+    )
@@ -0,0 +1,116 @@
+"""
+Delta sync of the catalog for offline terminals, see SyncAPIView.
+
+The response is JSON lines:
+
+    {"watermark": "...", "full": false}
+    {"model": "product", "fields": ["id", ...], "rows": [[...], ...]}
+    {"model": "product", "deleted": [3, 8]}
+    {"done": true}
+
+Terminals store the watermark and send it back as ``?since=`` next time.
+"""
+
+import json
+from datetime import timedelta
+
+from django.core.serializers.json import DjangoJSONEncoder
+from django.utils import timezone
+from pharmacy.config import (
+    SYNC_BATCH_SIZE,
+    SYNC_TOMBSTONE_DAYS,
+    SYNC_WATERMARK_SKEW,
+)
+from pharmacy.core.models import Company, Distribution, Formula
+from .models import Product, Stock, Tombstone
+
+SYNC_MODELS = {
+    "company": (Company, ["id", "name", "updated_at"]),
+    "formula": (Formula, ["id", "name", "updated_at"]),
+    "distribution": (Distribution, ["id", "name", "updated_at"]),
+    "product": (
+        Product,
+        [
+            "id",
+            "name",
+            "product_type",
+            "company_id",
+            "formula_id",
+            "distribution_id",
+            "avg_qty",
+            "per_pack",
+            "market_item",
+            "updated_at",
+        ],
+    ),
+    "stock": (
+        Stock,
+        [
+            "id",
+            "product_id",
+            "barcode",
+            "qty",
+            "price_per_unit",
+            "expiry_date",
+            "bought_from_id",
+            "updated_at",
+        ],
+    ),
+}
+
+SYNC_MODEL_NAMES = {model: name for name, (model, _) in SYNC_MODELS.items()}
+
+
+def get_watermark():
+    # Rows committed a moment after this read can carry an older updated_at, so
+    # the next sync starts a little earlier and sends them again to be safe
+    return timezone.now() - timedelta(seconds=SYNC_WATERMARK_SKEW)
+
+
+def is_full_sync(since):
+    # Tombstones are pruned after a while, older terminals start over
+    return since is None or since < timezone.now() - timedelta(days=SYNC_TOMBSTONE_DAYS)
+
+
+def encode(payload):
+    return json.dumps(payload, cls=DjangoJSONEncoder, separators=(",", ":")) + "\n"
+
+
+def batches(queryset):
+    batch = []
+    for item in queryset.iterator(chunk_size=SYNC_BATCH_SIZE):
+        batch.append(item)
+        if len(batch) == SYNC_BATCH_SIZE:
+            yield batch
+            batch = []
+    if batch:
+        yield batch
+
+
+def sync_lines(since):
+    full = is_full_sync(since)
+    yield encode({"watermark": get_watermark(), "full": full})
+
+    for name, (model, fields) in SYNC_MODELS.items():
+        rows = model.objects.order_by("pk").values_list(*fields)
+        if not full:
+            rows = rows.filter(updated_at__gte=since)
+        for batch in batches(rows):
+            yield encode({"model": name, "fields": fields, "rows": batch})
+
+        if not full:
+            deleted = (
+                Tombstone.objects.filter(model=name, deleted_at__gte=since)
+                .order_by("pk")
+                .values_list("object_id", flat=True)
+            )
+            for batch in batches(deleted):
+                yield encode({"model": name, "deleted": batch})
+
+    yield encode({"done": True})
+
+
+def prune_tombstones():
+    cutoff = timezone.now() - timedelta(days=SYNC_TOMBSTONE_DAYS)
+    deleted, _ = Tombstone.objects.filter(deleted_at__lt=cutoff).delete()
+    return deleted
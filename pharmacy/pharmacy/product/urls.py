@@ -1,7 +1,13 @@
 from django.urls import path, include
 
 from rest_framework.routers import DefaultRouter
-from .views import ProductViewSet, OrderAPIView, StockViewSet
+from .views import (
+    ProductViewSet,
+    OrderAPIView,
+    OrderExportAPIView,
+    StockViewSet,
+    SyncAPIView,
+)
 
 
 router = DefaultRouter()
@@ -10,5 +16,7 @@ router.register("stocks", StockViewSet, basename="stock")
 
 urlpatterns = [
     path("orders/", OrderAPIView.as_view(), name="orders"),
+    path("orders/export/", OrderExportAPIView.as_view(), name="order-export"),
     path("orders/<int:pk>/", OrderAPIView.as_view(), name="order-status-update"),
+    path("sync/", SyncAPIView.as_view(), name="sync"),
 ] + router.urls
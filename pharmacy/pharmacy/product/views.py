@@ -1,36 +1,69 @@
 # from rest_framework.viewsets import generics
-from rest_framework.generics import ListAPIView
-from .models import Product, Stock
+from rest_framework.generics import GenericAPIView, ListAPIView
+from .models import Product, ProductStockSummary, Stock, StockOrder
 from .serializers import (
     ProductDetailSerializer,
+    ProductListSerializer,
     OrderCreateSerializer,
     OrderDetailSerializer,
     StockCRUDSerializer,
+    StockListSerializer,
+    StockBulkCreateSerializer,
 )
-from .filters import ProductFilter, StockFilter
+from .filters import OrderFilter, ProductFilter, StockFilter
 from django_filters.rest_framework import DjangoFilterBackend
-from django.db.models import Prefetch
+from django.db.models import (
+    Case,
+    F,
+    Prefetch,
+    OuterRef,
+    Q,
+    Subquery,
+    Sum,
+    Value,
+    When,
+)
+from django.db.models.functions import Coalesce
 from rest_framework import filters, status
+from rest_framework.decorators import action
+from rest_framework.exceptions import NotFound, ValidationError
 from rest_framework.views import APIView
 from rest_framework.viewsets import ModelViewSet
-from django.db import transaction
+from django.db import IntegrityError, transaction
+from django.http import StreamingHttpResponse
+from django.utils import timezone
+from django.utils.dateparse import parse_datetime
 from rest_framework.request import Request
 from rest_framework.response import Response
 from .models import Order, Product
-from .paginations import CustomPagination
+from .paginations import CustomPagination, OrderPagination
+from .autocomplete import product_index
+from .scan import scan_stock
+from .sync import sync_lines
+from .export import (
+    ORDER_EXPORT_FIELDS,
+    PRODUCT_EXPORT_FIELDS,
+    STOCK_EXPORT_FIELDS,
+    export_response,
+)
 from rest_framework.permissions import IsAuthenticated, IsAdminUser
 from django.shortcuts import get_object_or_404
 from pharmacy.utills.enums import OrderStatusEnum
 from pharmacy.config import ONLY_SUPER_USER_CANCEL_ORDER
+from pharmacy.utills.serializers import get_list_param
+from pharmacy.db.mixins import ReplicaReadMixin
+from pharmacy.db.routers import read_from_replica
+from pharmacy.utills.views import ConditionalGetMixin
+from pharmacy.db.transaction import immediate_atomic
+from datetime import date
+import csv
+import io
 
 
-class ProductViewSet(ModelViewSet):
-    queryset = (
-        Product.objects.select_related(
-            "company", "distribution", "formula"
-        )  # changed from ProductProxy
-        .prefetch_related(Prefetch("stocks", queryset=Stock.objects.filter(qty__gt=0)))
-        .distinct()
+class ProductViewSet(ReplicaReadMixin, ConditionalGetMixin, ModelViewSet):
+    # No distinct(): expiry filters use EXISTS, so rows are never multiplied
+    queryset = Product.objects.select_related(  # changed from ProductProxy
+        "company", "distribution", "formula"
     )
     # queryset = ProductProxy.objects.all()
     serializer_class = ProductDetailSerializer
@@ -39,6 +72,53 @@ class ProductViewSet(ModelViewSet):
     ordering_fields = ["name", "total_qty", "product_type"]
     ordering = ["name"]
     pagination_class = CustomPagination
+    replica_actions = ["list", "retrieve", "export"]
+    # The stock summary is refreshed whenever the product's stock levels change,
+    # the related names are rendered by the list
+    conditional_fields = [
+        "updated_at",
+        "stock_summary__updated_at",
+        "company__updated_at",
+        "distribution__updated_at",
+        "formula__updated_at",
+    ]
+
+    def get_queryset(self):
+        # Same semantics as Product.total_qty, computed in SQL so it can be
+        # sorted and paginated without a query per row
+        today = date.today()
+        live_stock_qty = (
+            Stock.objects.filter(product=OuterRef("pk"))
+            .filter(Q(expiry_date__gte=today) | Q(expiry_date__isnull=True))
+            .order_by()
+            .values("product")
+            .annotate(total=Sum("qty"))
+            .values("total")
+        )
+        queryset = (
+            super()
+            .get_queryset()
+            .annotate(total_qty=Coalesce(Subquery(live_stock_qty), Value(0)))
+        )
+        # The flat list serializer only renders stocks when asked to. Commands
+        # such as check_query_plans build the viewset without a request.
+        action = getattr(self, "action", None)
+        expand = get_list_param(getattr(self, "request", None), "expand")
+        if action != "list" or "stocks" in expand:
+            queryset = queryset.prefetch_related(
+                Prefetch(
+                    "stocks",
+                    queryset=Stock.objects.filter(qty__gt=0).select_related(
+                        "bought_from"
+                    ),
+                )
+            )
+        return queryset
+
+    def get_serializer_class(self):
+        if self.action == "list":
+            return ProductListSerializer
+        return super().get_serializer_class()
 
     def get_permissions(self):
         if self.action in ["update", "partial_update", "destroy"]:
@@ -47,9 +127,27 @@ class ProductViewSet(ModelViewSet):
             permission_classes = [IsAuthenticated]
         return [permission() for permission in permission_classes]
 
+    @action(detail=False, methods=["get"], url_path="autocomplete")
+    def autocomplete(self, request: Request) -> Response:
+        """
+        Lightweight point-of-sale lookup by name, formula or barcode prefix, served
+        from the in-memory index without touching the database.
+        """
+        try:
+            limit = min(int(request.query_params.get("limit", 10)), 50)
+        except ValueError:
+            raise ValidationError({"limit": "Must be a number."})
+        return Response(product_index.lookup(request.query_params.get("q", ""), limit))
+
+    @action(detail=False, methods=["get"], url_path="export")
+    def export(self, request: Request):
+        """The filtered products as one streamed CSV or JSON lines file."""
+        queryset = self.filter_queryset(self.get_queryset())
+        return export_response(request, queryset, PRODUCT_EXPORT_FIELDS, "products")
+
 
-class StockViewSet(ModelViewSet):
-    queryset = Stock.objects.select_related("product").all()
+class StockViewSet(ReplicaReadMixin, ConditionalGetMixin, ModelViewSet):
+    queryset = Stock.objects.select_related("product", "bought_from").all()
     serializer_class = StockCRUDSerializer
     filter_backends = [filters.OrderingFilter, DjangoFilterBackend]
     filterset_class = StockFilter
@@ -57,6 +155,12 @@ class StockViewSet(ModelViewSet):
     ordering_fields = ["entry_date", "product", "expiry_date"]
     ordering = ["-entry_date"]
     pagination_class = CustomPagination
+    replica_actions = ["list", "retrieve", "export"]
+    conditional_fields = [
+        "updated_at",
+        "product__updated_at",
+        "bought_from__updated_at",
+    ]
 
     def get_permissions(self):
         if self.action in ["update", "partial_update", "destroy"]:
@@ -65,25 +169,176 @@ class StockViewSet(ModelViewSet):
             permission_classes = [IsAuthenticated]
         return [permission() for permission in permission_classes]
 
+    def get_serializer_class(self):
+        if self.action == "list":
+            return StockListSerializer
+        return super().get_serializer_class()
+
     def perform_create(self, serializer):
         serializer.save(added_by=self.request.user)
 
+    @action(detail=False, methods=["post"], url_path="bulk")
+    def bulk(self, request: Request) -> Response:
+        """
+        Record a whole supplier delivery at once, either as JSON
+        ``{"bought_from": id, "stocks": [...]}`` or as a CSV ``file`` upload with
+        product, qty, price_per_unit, purchase_price, expiry_date and barcode columns.
+        """
+        upload = request.FILES.get("file")
+        if upload:
+            data = {
+                "bought_from": request.data.get("bought_from"),
+                "stocks": read_stock_csv(upload),
+            }
+        else:
+            data = request.data
+
+        serializer = StockBulkCreateSerializer(
+            data=data, context=self.get_serializer_context()
+        )
+        serializer.is_valid(raise_exception=True)
+        stocks = serializer.save(added_by=request.user)
+
+        return Response(
+            {
+                "created": len(stocks),
+                "results": [
+                    {
+                        "line": line,
+                        "id": stock.id,
+                        "barcode": stock.barcode,
+                        "product": stock.product_id,
+                    }
+                    for line, stock in enumerate(stocks)
+                ],
+            },
+            status=status.HTTP_201_CREATED,
+        )
+
+    @action(detail=False, methods=["get"], url_path=r"scan/(?P<barcode>[^/]+)")
+    def scan(self, request: Request, barcode=None) -> Response:
+        """
+        Checkout lookup of a single stock by its Code128 barcode, without the
+        filtering, counting and nested serializers of the list endpoint.
+        """
+        payload = scan_stock(barcode)
+        if payload is None:
+            raise NotFound("No stock with this barcode.")
+        return Response(payload)
+
+    @action(detail=False, methods=["get"], url_path="export")
+    def export(self, request: Request):
+        """The filtered stocks as one streamed CSV or JSON lines file."""
+        queryset = self.filter_queryset(self.get_queryset())
+        return export_response(request, queryset, STOCK_EXPORT_FIELDS, "stocks")
+
+
+def read_stock_csv(upload):
+    rows = csv.DictReader(io.TextIOWrapper(upload, encoding="utf-8-sig"))
+    # Empty cells mean "not provided" rather than an empty value
+    return [
+        {key.strip(): value.strip() for key, value in row.items() if key and value}
+        for row in rows
+    ]
+
+
+def order_detail_queryset():
+    # Everything OrderDetailSerializer renders, fetched in a fixed number of queries
+    return Order.objects.select_related("customer", "created_by").prefetch_related(
+        Prefetch(
+            "stock_orders",
+            queryset=StockOrder.objects.select_related(
+                "stock__product", "stock__bought_from"
+            ),
+        )
+    )
+
+
+def move_order_stocks(order, direction):
+    """
+    Take the order's quantities out of (direction=-1) or back into (direction=1)
+    stock with a single UPDATE. Must run inside a transaction.
+    """
+    quantities = dict(
+        order.stock_orders.order_by()
+        .values("stock_id")
+        .annotate(total=Sum("quantity"))
+        .values_list("stock_id", "total")
+    )
+    if not quantities:
+        return
 
-class OrderAPIView(APIView):
+    # Lock the stocks in primary key order so concurrent checkouts can't deadlock
+    locked_stocks = (
+        Stock.objects.select_for_update(of=("self",))
+        .filter(id__in=quantities)
+        .order_by("id")
+        .values_list("id", "qty", "product_id", "product__name")
+    )
+    product_ids = set()
+    for stock_id, qty, product_id, product_name in locked_stocks:
+        if qty + direction * quantities[stock_id] < 0:
+            raise ValidationError(f"Not enough stock for product: {product_name}")
+        product_ids.add(product_id)
+
+    try:
+        # The savepoint lets the non-negative qty constraint surface as a 400
+        with transaction.atomic():
+            Stock.objects.filter(id__in=quantities).update(
+                qty=F("qty")
+                + Case(
+                    *[
+                        When(id=stock_id, then=Value(direction * quantity))
+                        for stock_id, quantity in quantities.items()
+                    ],
+                    default=Value(0),
+                ),
+                updated_at=timezone.now(),
+            )
+    except IntegrityError:
+        raise ValidationError("Not enough stock to complete the order")
+
+    ProductStockSummary.refresh(product_ids)
+
+
+class OrderAPIView(GenericAPIView):
     permission_classes = [IsAuthenticated]
+    serializer_class = OrderDetailSerializer
+    filter_backends = [DjangoFilterBackend]
+    filterset_class = OrderFilter
+    pagination_class = OrderPagination
+
+    def get_queryset(self):
+        return order_detail_queryset().order_by("-created_at")
+
+    def get(self, request: Request, pk=None, *args, **kwargs) -> Response:
+        """
+        The sales history, newest first and paginated by ``?cursor=``, or a
+        single order when called with its id.
+        """
+        if pk is not None:
+            order = get_object_or_404(self.get_queryset(), pk=pk)
+            return Response(self.get_serializer(order).data)
+
+        queryset = self.filter_queryset(self.get_queryset())
+        page = self.paginate_queryset(queryset)
+        serializer = self.get_serializer(page, many=True)
+        return self.get_paginated_response(serializer.data)
 
     def post(self, request: Request) -> Response:
         serializer = OrderCreateSerializer(
             data=request.data, context={"request": request}
         )
         serializer.is_valid(raise_exception=True)
-        with transaction.atomic():
+        with immediate_atomic():
             order = serializer.save()
+        order = order_detail_queryset().get(pk=order.pk)
         return Response(
-            OrderDetailSerializer(order).data, status=status.HTTP_201_CREATED
+            OrderDetailSerializer(order, context={"request": request}).data,
+            status=status.HTTP_201_CREATED,
         )
 
-    @transaction.atomic()
+    @immediate_atomic()
     def patch(self, request: Request, pk, *args, **kwargs):
         if "status" not in request.data or len(request.data) > 1:
             return Response(
@@ -104,7 +359,8 @@ class OrderAPIView(APIView):
             OrderStatusEnum.CANCELLED.value: [],
         }
 
-        instance = get_object_or_404(Order, pk=pk)
+        # Lock the order so two terminals can't apply the same transition twice
+        instance = get_object_or_404(Order.objects.select_for_update(), pk=pk)
 
         if instance.status not in allowed_transitions:
             return Response(
@@ -123,9 +379,7 @@ class OrderAPIView(APIView):
             instance.status == OrderStatusEnum.PENDING.value
             and new_status == OrderStatusEnum.COMPLETED.value
         ):
-            for stock_order in instance.stock_orders.all():
-                stock_order.stock.qty -= stock_order.quantity
-                stock_order.stock.save()
+            move_order_stocks(instance, direction=-1)
         elif (
             instance.status == OrderStatusEnum.COMPLETED.value
             and new_status == OrderStatusEnum.CANCELLED.value
@@ -136,9 +390,7 @@ class OrderAPIView(APIView):
                     status=status.HTTP_403_FORBIDDEN,
                 )
 
-            for stock_order in instance.stock_orders.all():
-                stock_order.stock.qty += stock_order.quantity
-                stock_order.stock.save()
+            move_order_stocks(instance, direction=1)
 
         serializer = OrderDetailSerializer(
             instance, data={"status": request.data["status"]}, partial=True
@@ -147,8 +399,51 @@ class OrderAPIView(APIView):
         if serializer.is_valid():
             serializer.save()
             return Response(
-                serializer.data,
+                OrderDetailSerializer(
+                    order_detail_queryset().get(pk=pk), context={"request": request}
+                ).data,
                 status=status.HTTP_200_OK,
             )
 
+        transaction.set_rollback(True)
         return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
+
+
+class OrderExportAPIView(GenericAPIView):
+    """The filtered orders as one streamed CSV or JSON lines file."""
+
+    permission_classes = [IsAuthenticated]
+    queryset = Order.objects.select_related("customer", "created_by")
+    filter_backends = [DjangoFilterBackend]
+    filterset_class = OrderFilter
+
+    def get(self, request: Request):
+        queryset = self.filter_queryset(self.get_queryset()).order_by("-created_at")
+        with read_from_replica():
+            return export_response(request, queryset, ORDER_EXPORT_FIELDS, "orders")
+
+
+class SyncAPIView(APIView):
+    """
+    Catalog rows changed since ``?since=<watermark>``, plus the ids of deleted
+    ones, streamed as JSON lines in batches (see ``sync.py``). Without ``since``
+    the whole catalog is sent.
+    """
+
+    permission_classes = [IsAuthenticated]
+
+    def get(self, request: Request):
+        since = request.query_params.get("since")
+        if since:
+            try:
+                since = parse_datetime(since)
+            except ValueError:
+                since = None
+            if since is None:
+                raise ValidationError({"since": "Must be an ISO 8601 datetime."})
+            if timezone.is_naive(since):
+                since = timezone.make_aware(since)
+
+        return StreamingHttpResponse(
+            sync_lines(since or None), content_type="application/x-ndjson"
+        )
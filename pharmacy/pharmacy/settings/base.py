@@ -11,7 +11,7 @@ https://docs.djangoproject.com/en/5.0/ref/settings/
 """
 
 from pathlib import Path
-from ..config import TZ, DBG
+from ..config import TZ, DBG, QUERY_BUDGET_STRICT, SQL_LOG_LEVEL, CACHE_URL
 
 
 # Build paths inside the project like this: BASE_DIR / 'subdir'.
@@ -49,6 +49,8 @@ INSTALLED_APPS = [
 ]
 
 MIDDLEWARE = [
+    # First, so the queries of every other middleware are counted too
+    "pharmacy.middleware.QueryBudgetMiddleware",
     "django.middleware.security.SecurityMiddleware",
     "django.contrib.sessions.middleware.SessionMiddleware",
     "django.middleware.common.CommonMiddleware",
@@ -134,6 +136,64 @@ REST_FRAMEWORK = {
     "DEFAULT_FILTER_BACKENDS": ["django_filters.rest_framework.DjangoFilterBackend"],
 }
 
+# Cache
+# https://docs.djangoproject.com/en/5.0/topics/cache/
+# Per process by default, which is only safe with a single worker. Set
+# CACHE_URL to share it through Redis, so an invalidation in one worker reaches
+# all of them; production settings require it.
+
+CACHES = {
+    "default": (
+        {
+            "BACKEND": "django.core.cache.backends.redis.RedisCache",
+            "LOCATION": CACHE_URL,
+        }
+        if CACHE_URL
+        else {
+            "BACKEND": "django.core.cache.backends.locmem.LocMemCache",
+            "OPTIONS": {"MAX_ENTRIES": 10000},
+        }
+    )
+}
+
+# Most queries a view may run, including authentication, checked by
+# QueryBudgetMiddleware. Views not listed are only measured.
+QUERY_BUDGETS = {
+    "ProductViewSet.list": 6,
+    "ProductViewSet.retrieve": 4,
+    "ProductViewSet.autocomplete": 3,
+    "StockViewSet.list": 5,
+    "StockViewSet.retrieve": 3,
+    "StockViewSet.scan": 2,
+    "StockViewSet.bulk": 20,
+    "OrderAPIView.get": 5,
+    "OrderAPIView.post": 12,
+    "OrderAPIView.patch": 20,
+}
+
+# Raise instead of logging a warning when a view goes over its budget
+QUERY_BUDGET_STRICT = QUERY_BUDGET_STRICT
+
+# Number of slowest statements included in each request's log record
+QUERY_LOG_SLOWEST = 3
+
+# SQL_LOG_LEVEL=INFO logs the query count and slowest statements of every request
+LOGGING = {
+    "version": 1,
+    "disable_existing_loggers": False,
+    "handlers": {
+        "console": {
+            "class": "logging.StreamHandler",
+        },
+    },
+    "loggers": {
+        "pharmacy.sql": {
+            "handlers": ["console"],
+            "level": SQL_LOG_LEVEL,
+        },
+    },
+}
+
 CORS_ALLOWED_ORIGINS = [
     "http://localhost:3000",  # Allow React app running on localhost:3000
 ]
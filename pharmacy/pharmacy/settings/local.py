@@ -1,4 +1,5 @@
 from .base import *
+from ..config import SQLITE_NAME, SQLITE_TUNED
 
 
 # Database
@@ -6,8 +7,13 @@ from .base import *
 
 DATABASES = {
     "default": {
-        "ENGINE": "django.db.backends.sqlite3",
-        "NAME": BASE_DIR / "db.sqlite3",
+        # WAL and tuned pragmas, SQLITE_TUNED=False for Django's stock backend
+        "ENGINE": (
+            "pharmacy.db.backends.sqlite3"
+            if SQLITE_TUNED
+            else "django.db.backends.sqlite3"
+        ),
+        "NAME": SQLITE_NAME or BASE_DIR / "db.sqlite3",
         "OPTIONS": {
             "timeout": 30,
         },
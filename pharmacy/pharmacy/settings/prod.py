@@ -1,5 +1,18 @@
 from .base import *
 from datetime import timedelta
+from django.core.exceptions import ImproperlyConfigured
+from ..config import (
+    CACHE_URL,
+    DB_CONN_MAX_AGE,
+    DB_HOST,
+    DB_NAME,
+    DB_PASSWORD,
+    DB_PGBOUNCER,
+    DB_PORT,
+    DB_REPLICA_HOSTS,
+    DB_STATEMENT_TIMEOUT_MS,
+    DB_USER,
+)
 
 
 ALLOWED_HOSTS = ["*"]
@@ -25,3 +38,51 @@ SIMPLE_JWT = {
     "SLIDING_TOKEN_LIFETIME": timedelta(minutes=10),
     "SLIDING_TOKEN_REFRESH_LIFETIME": timedelta(days=7),
 }
+
+
+# Production runs several workers, and cached reference lists live for
+# REFERENCE_CACHE_TIMEOUT: with a per process cache an invalidation in one
+# worker would never reach the others.
+if not CACHE_URL:
+    raise ImproperlyConfigured("CACHE_URL must point to a shared Redis cache.")
+
+
+# Database
+# https://docs.djangoproject.com/en/5.0/ref/settings/#databases
+
+
+def postgres_database(host):
+    database = {
+        "ENGINE": "django.db.backends.postgresql",
+        "NAME": DB_NAME,
+        "USER": DB_USER,
+        "PASSWORD": DB_PASSWORD,
+        "HOST": host,
+        "PORT": DB_PORT,
+        "CONN_HEALTH_CHECKS": True,
+        "OPTIONS": {},
+    }
+    if DB_PGBOUNCER:
+        # Transaction pooling: pgbouncer owns the connections, and a server side
+        # cursor or a startup parameter would not survive a change of backend.
+        # Set the timeout with ALTER ROLE ... SET statement_timeout instead.
+        database["CONN_MAX_AGE"] = 0
+        database["DISABLE_SERVER_SIDE_CURSORS"] = True
+    else:
+        database["CONN_MAX_AGE"] = DB_CONN_MAX_AGE
+        database["OPTIONS"][
+            "options"
+        ] = f"-c statement_timeout={DB_STATEMENT_TIMEOUT_MS}"
+    return database
+
+
+DATABASES = {"default": postgres_database(DB_HOST)}
+
+DATABASE_REPLICAS = []
+for index, host in enumerate(DB_REPLICA_HOSTS):
+    alias = f"replica_{index}"
+    DATABASES[alias] = postgres_database(host)
+    DATABASES[alias]["TEST"] = {"MIRROR": "default"}
+    DATABASE_REPLICAS.append(alias)
+
+DATABASE_ROUTERS = ["pharmacy.db.routers.ReplicaRouter"]
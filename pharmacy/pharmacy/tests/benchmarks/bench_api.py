@@ -0,0 +1,112 @@
+"""
+Latency, query count and peak memory of the main endpoints against a synthetic
+pharmacy built by ``generate_pharmacy_data``.
+
+    pytest tests/benchmarks/bench_api.py
+
+Compare runs with pytest-benchmark's --benchmark-autosave and
+--benchmark-compare. BENCH_SCALE=10 runs against a ten times larger dataset.
+"""
+
+import math
+
+import pytest
+
+from pharmacy.core.models import Customer, Distribution
+from pharmacy.product.models import Order, Stock
+
+pytest.importorskip("pytest_benchmark")
+
+
+@pytest.mark.parametrize(
+    "params",
+    [
+        {},
+        {"expiration": "expired"},
+        {"expiration": "shortExpired"},
+        {"expiration": "expiredAndShortExpired"},
+        {"low_qty": "low"},
+        {"low_qty": "veryLow"},
+        {"showInactive": "false"},
+        {"company_ids": "1,2,3"},
+        {"distribution_ids": "1,2"},
+        {"formula_ids": "1,2,3"},
+        {"search": "product 12"},
+        {"ordering": "-total_qty"},
+        {"cursor": ""},
+        {"expand": "company,distribution,formula,stocks"},
+    ],
+    ids=lambda params: ",".join(f"{k}={v}" for k, v in params.items()) or "plain",
+)
+def test_product_list(bench_client, measure, params):
+    measure(lambda: bench_client.get("/products/", params))
+
+
+@pytest.mark.parametrize(
+    "params",
+    [
+        {},
+        {"expiration": "expired"},
+        {"product_type": "TAB"},
+        {"bought_from": "1"},
+        {"product_name": "product 1"},
+        {"start_date": "2020-01-01", "end_date": "2100-01-01"},
+        {"showInactive": "false"},
+        {"search": "product 12"},
+        {"ordering": "expiry_date"},
+    ],
+    ids=lambda params: ",".join(f"{k}={v}" for k, v in params.items()) or "plain",
+)
+def test_stock_list(bench_client, measure, params):
+    measure(lambda: bench_client.get("/stocks/", params))
+
+
+def test_companies_by_distribution(bench_client, measure):
+    distribution = Distribution.objects.order_by("id").first()
+    measure(lambda: bench_client.get("/company/", {"distribution_id": distribution.pk}))
+
+
+@pytest.mark.parametrize(
+    "params",
+    [{}, {"status": "Completed"}, {"count": "exact"}],
+    ids=lambda params: ",".join(f"{k}={v}" for k, v in params.items()) or "plain",
+)
+def test_order_list(bench_client, measure, params):
+    measure(lambda: bench_client.get("/orders/", params))
+
+
+def order_payload():
+    stocks = Stock.objects.filter(qty__gte=50).order_by("id")[:3]
+    return {
+        "customer": Customer.objects.order_by("id").first().pk,
+        # A cent off, float rounding must not push it above the server's total
+        "total_after_disc": math.floor(
+            sum(stock.price_per_unit for stock in stocks) * 100 - 1
+        )
+        / 100,
+        "stock_orders": [{"stock": stock.pk, "quantity": 1} for stock in stocks],
+    }
+
+
+def test_order_create(bench_client, measure):
+    payload = order_payload()
+    measure(
+        lambda: bench_client.post("/orders/", payload, format="json"),
+        expected_status=201,
+    )
+
+
+def test_order_complete(bench_client, measure):
+    payload = order_payload()
+
+    def pending_order():
+        response = bench_client.post("/orders/", payload, format="json")
+        assert response.status_code == 201, response.data
+        return (Order.objects.get(pk=response.data["id"]),)
+
+    measure(
+        lambda order: bench_client.patch(
+            f"/orders/{order.pk}/", {"status": "Completed"}, format="json"
+        ),
+        setup=pending_order,
+    )
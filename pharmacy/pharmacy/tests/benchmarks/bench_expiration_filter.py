@@ -0,0 +1,108 @@
+"""
+Latency of the expiry filters against the size of the stock table, comparing the
+previous join + distinct query with the EXISTS subqueries.
+
+Not collected by the normal test run; run it explicitly:
+
+    pytest tests/benchmarks/bench_expiration_filter.py
+
+Stock table sizes can be changed with BENCH_STOCK_SIZES=1000,10000,50000.
+"""
+
+import os
+import statistics
+import time
+from datetime import date, timedelta
+
+import pytest
+from django.db.models import BooleanField, Case, Q, Value, When
+
+from pharmacy.product.filters import ProductFilter
+from pharmacy.product.models import Product, Stock
+from pharmacy.utills.enums import ExpiryEnum
+
+STOCK_SIZES = [
+    int(size) for size in os.getenv("BENCH_STOCK_SIZES", "1000,5000,20000").split(",")
+]
+STOCKS_PER_PRODUCT = 10
+REPEAT = 5
+
+
+def legacy_filter_expiration(queryset, value):
+    today = date.today()
+    six_months_later = today + timedelta(days=180)
+
+    queryset = queryset.annotate(
+        is_expired=Case(
+            When(stocks__expiry_date__lt=Value(today), then=Value(True)),
+            default=Value(False),
+            output_field=BooleanField(),
+        ),
+        is_short_expired=Case(
+            When(
+                stocks__expiry_date__gte=Value(today),
+                stocks__expiry_date__lt=Value(six_months_later),
+                then=(Value(True)),
+            ),
+            default=Value(False),
+            output_field=BooleanField(),
+        ),
+    )
+    if value == ExpiryEnum.EXPIRED.value:
+        return queryset.filter(is_expired=True).distinct()
+    elif value == ExpiryEnum.SHORT_EXPIRED.value:
+        return queryset.filter(is_short_expired=True).distinct()
+    return queryset.filter(Q(is_expired=True) | Q(is_short_expired=True)).distinct()
+
+
+def fill_stock_table(make_product, size):
+    Stock.objects.all().delete()
+    Product.objects.all().delete()
+    today = date.today()
+    products = [make_product(f"Product {i}") for i in range(size // STOCKS_PER_PRODUCT)]
+    Stock.objects.bulk_create(
+        Stock(
+            product=product,
+            qty=i % 7,
+            price_per_unit=10,
+            purchase_price=8,
+            # Spread batches from two months ago to two years ahead
+            expiry_date=today + timedelta(days=(i * 37) % 790 - 60),
+        )
+        for product in products
+        for i in range(STOCKS_PER_PRODUCT)
+    )
+
+
+def median_ms(build_queryset):
+    timings = []
+    for _ in range(REPEAT):
+        start = time.perf_counter()
+        ids = list(build_queryset().order_by("name").values_list("id", flat=True))
+        timings.append((time.perf_counter() - start) * 1000)
+    return statistics.median(timings), ids
+
+
+@pytest.mark.django_db
+def test_expiration_filter_latency(make_product, capsys):
+    rows = []
+    for size in STOCK_SIZES:
+        fill_stock_table(make_product, size)
+        for value in ExpiryEnum.list_all_values():
+            base = Product.objects.all()
+            legacy_ms, legacy_ids = median_ms(
+                lambda: legacy_filter_expiration(base, value)
+            )
+            exists_ms, exists_ids = median_ms(
+                lambda: ProductFilter(queryset=base).filter_expiration(
+                    base, "expiration", value
+                )
+            )
+            assert legacy_ids == exists_ids
+            rows.append((size, value, legacy_ms, exists_ms))
+
+    with capsys.disabled():
+        print()
+        print(f"{'stocks':>8} {'expiration':<24} {'join+distinct':>14} {'exists':>10}")
+        for size, value, legacy_ms, exists_ms in rows:
+            print(f"{size:>8} {value:<24} {legacy_ms:>12.2f}ms {exists_ms:>8.2f}ms")
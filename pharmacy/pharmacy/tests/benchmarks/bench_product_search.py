@@ -0,0 +1,62 @@
+"""
+Latency of ?search= against a large product catalog, next to the plain
+name__icontains lookup it replaces.
+
+    pytest tests/benchmarks/bench_product_search.py
+
+The catalog size can be changed with BENCH_PRODUCTS=50000.
+"""
+
+import os
+import statistics
+import time
+
+import pytest
+
+from pharmacy.product import search
+from pharmacy.product.models import Product
+
+PRODUCT_COUNT = int(os.getenv("BENCH_PRODUCTS", "50000"))
+TERMS = ["pan", "xtra", "lol 12", "zzz"]
+REPEAT = 20
+SYLLABLES = ["pa", "na", "dol", "bru", "fen", "cal", "pol", "xa", "ex", "tra"]
+
+
+def product_name(i):
+    parts = [SYLLABLES[(i // 10**k) % len(SYLLABLES)] for k in range(3)]
+    return f"{''.join(parts).title()} {i}"
+
+
+def median_ms(build_queryset):
+    timings = []
+    for _ in range(REPEAT):
+        start = time.perf_counter()
+        list(build_queryset()[:20].values_list("id", flat=True))
+        timings.append((time.perf_counter() - start) * 1000)
+    return statistics.median(timings)
+
+
+@pytest.mark.django_db
+def test_product_search_latency(capsys):
+    Product.objects.bulk_create(
+        Product(name=product_name(i), product_type="TAB", avg_qty=1)
+        for i in range(PRODUCT_COUNT)
+    )
+    search.rebuild_index()
+
+    rows = []
+    for term in TERMS:
+        icontains_ms = median_ms(
+            lambda: Product.objects.filter(name__icontains=term).order_by("name")
+        )
+        search_ms = median_ms(
+            lambda: search.search_products(Product.objects.all(), term)
+        )
+        rows.append((term, icontains_ms, search_ms))
+
+    with capsys.disabled():
+        print()
+        print(f"{PRODUCT_COUNT} products")
+        print(f"{'term':<10} {'icontains':>12} {'search':>10}")
+        for term, icontains_ms, search_ms in rows:
+            print(f"{term:<10} {icontains_ms:>10.2f}ms {search_ms:>8.2f}ms")
@@ -0,0 +1,110 @@
+"""
+Concurrent checkout on SQLite with Django's stock backend against the tuned
+pharmacy.db.backends.sqlite3 one (WAL, pragmas and BEGIN IMMEDIATE orders).
+
+    pytest tests/benchmarks/bench_sqlite_checkout.py
+
+Each run gets a fresh database file and a runserver process, which
+loadtest_checkout then drives with BENCH_CASHIERS concurrent cashiers for
+BENCH_SECONDS seconds.
+"""
+
+import os
+import socket
+import subprocess
+import sys
+import time
+from pathlib import Path
+
+import pytest
+
+MANAGE_PY = Path(__file__).resolve().parents[3] / "manage.py"
+CASHIERS = os.getenv("BENCH_CASHIERS", "8")
+SECONDS = os.getenv("BENCH_SECONDS", "15")
+
+
+def free_port():
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+def manage(env, *args, **kwargs):
+    return subprocess.run(
+        [sys.executable, str(MANAGE_PY), *args],
+        env=env,
+        check=True,
+        capture_output=True,
+        text=True,
+        **kwargs,
+    )
+
+
+def wait_for(port, timeout=30):
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        try:
+            socket.create_connection(("127.0.0.1", port), timeout=1).close()
+            return
+        except OSError:
+            time.sleep(0.2)
+    raise TimeoutError(f"Server on port {port} did not start")
+
+
+def run_checkout(tmp_path, tuned):
+    env = {
+        **os.environ,
+        "DEBUG": "True",
+        "SQLITE_NAME": str(tmp_path / f"checkout-{tuned}.sqlite3"),
+        "SQLITE_TUNED": str(tuned),
+    }
+    manage(env, "migrate", "-v0")
+    manage(env, "generate_pharmacy_data", "--products=500", "--orders=500")
+    manage(
+        env,
+        "shell",
+        "-c",
+        "from django.contrib.auth.models import User; "
+        "User.objects.create_superuser('bench', password='bench')",
+    )
+
+    port = free_port()
+    server = subprocess.Popen(
+        [sys.executable, str(MANAGE_PY), "runserver", str(port), "--noreload"],
+        env=env,
+        stdout=subprocess.DEVNULL,
+        stderr=subprocess.DEVNULL,
+    )
+    try:
+        wait_for(port)
+        result = subprocess.run(
+            [
+                sys.executable,
+                str(MANAGE_PY),
+                "loadtest_checkout",
+                f"--url=http://127.0.0.1:{port}",
+                "--username=bench",
+                "--password=bench",
+                f"--cashiers={CASHIERS}",
+                f"--duration={SECONDS}",
+            ],
+            env=env,
+            capture_output=True,
+            text=True,
+        )
+    finally:
+        server.terminate()
+        server.wait()
+    return result.stdout + result.stderr
+
+
+@pytest.mark.parametrize("tuned", [False, True], ids=["stock", "tuned"])
+def test_sqlite_checkout_concurrency(tmp_path, capsys, tuned):
+    report = run_checkout(tmp_path, tuned)
+
+    with capsys.disabled():
+        print()
+        backend = "pharmacy.db.backends.sqlite3" if tuned else "django sqlite3"
+        print(f"{backend}, {CASHIERS} cashiers for {SECONDS}s")
+        print(report)
+    assert "Stock invariants hold" in report
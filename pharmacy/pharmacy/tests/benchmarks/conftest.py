@@ -0,0 +1,86 @@
+import os
+import tracemalloc
+
+import pytest
+from django.contrib.auth.models import User
+from django.core.management import call_command
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from rest_framework.test import APIClient
+
+# Dataset size for bench_api.py, e.g. BENCH_SCALE=10 for 20000 products
+BENCH_SCALE = float(os.getenv("BENCH_SCALE", "1"))
+
+measurements = []
+
+
+@pytest.fixture(scope="session")
+def bench_dataset(django_db_setup, django_db_blocker):
+    with django_db_blocker.unblock():
+        call_command(
+            "generate_pharmacy_data",
+            companies=int(50 * BENCH_SCALE),
+            formulas=int(300 * BENCH_SCALE),
+            distributions=int(20 * BENCH_SCALE),
+            customers=int(200 * BENCH_SCALE),
+            products=int(2000 * BENCH_SCALE),
+            orders=int(2000 * BENCH_SCALE),
+            discrepancies=int(200 * BENCH_SCALE),
+            stdout=open(os.devnull, "w"),
+        )
+        user = User.objects.create_superuser(username="bench", password="bench")
+    return user
+
+
+@pytest.fixture
+def bench_client(bench_dataset, db):
+    client = APIClient()
+    client.force_authenticate(user=bench_dataset)
+    return client
+
+
+@pytest.fixture
+def measure(benchmark):
+    """
+    Benchmarks ``request()`` and records the query count and peak Python memory of
+    one extra instrumented call for the summary table.
+    """
+
+    def measure(request, setup=None, expected_status=200):
+        args = setup() if setup else ()
+        with CaptureQueriesContext(connection) as context:
+            tracemalloc.start()
+            response = request(*args)
+            _, peak = tracemalloc.get_traced_memory()
+            tracemalloc.stop()
+        assert response.status_code == expected_status, response.data
+
+        benchmark.extra_info["queries"] = len(context.captured_queries)
+        benchmark.extra_info["peak_kib"] = round(peak / 1024)
+        if setup:
+            benchmark.pedantic(
+                request, setup=lambda: (setup(), {}), rounds=20, warmup_rounds=1
+            )
+        else:
+            benchmark(request)
+        # No timings under --benchmark-disable, e.g. in a quick smoke run
+        if benchmark.stats is not None:
+            measurements.append((benchmark.name, benchmark))
+
+    return measure
+
+
+def pytest_terminal_summary(terminalreporter):
+    if not measurements:
+        return
+    terminalreporter.section("queries and memory")
+    terminalreporter.write_line(
+        f"{'benchmark':<60} {'median ms':>10} {'queries':>8} {'peak KiB':>9}"
+    )
+    for name, benchmark in measurements:
+        stats = benchmark.stats.stats
+        terminalreporter.write_line(
+            f"{name:<60} {stats.median * 1000:>10.2f} "
+            f"{benchmark.extra_info['queries']:>8} "
+            f"{benchmark.extra_info['peak_kib']:>9}"
+        )
@@ -0,0 +1,76 @@
+import pytest
+from django.contrib.auth.models import User
+from django.core.cache import cache
+from rest_framework.test import APIClient
+
+from pharmacy.core.models import Company, Distribution, Formula
+from pharmacy.product.autocomplete import product_index
+from pharmacy.product.models import Product, Stock
+
+
+@pytest.fixture(autouse=True)
+def clear_cache():
+    cache.clear()
+    product_index.clear()
+
+
+@pytest.fixture(autouse=True)
+def strict_query_budgets(settings):
+    settings.QUERY_BUDGET_STRICT = True
+
+
+@pytest.fixture
+def user(db):
+    return User.objects.create_user(username="cashier", password="cashier")
+
+
+@pytest.fixture
+def api_client(user):
+    client = APIClient()
+    client.force_authenticate(user=user)
+    return client
+
+
+@pytest.fixture
+def distribution(db):
+    return Distribution.objects.create(name="Main Distribution")
+
+
+@pytest.fixture
+def make_product(db, distribution):
+    company = Company.objects.create(name="GSK")
+    formula = Formula.objects.create(name="Paracetamol")
+
+    def make_product(name="Panadol", **kwargs):
+        kwargs.setdefault("product_type", "TAB")
+        kwargs.setdefault("avg_qty", 10)
+        kwargs.setdefault("formula", formula)
+        return Product.objects.create(
+            name=name,
+            company=company,
+            distribution=distribution,
+            **kwargs,
+        )
+
+    return make_product
+
+
+@pytest.fixture
+def product(make_product):
+    return make_product()
+
+
+@pytest.fixture
+def make_stock(distribution):
+    def make_stock(product, qty, expiry_date=None, **kwargs):
+        kwargs.setdefault("price_per_unit", 10)
+        kwargs.setdefault("purchase_price", 8)
+        kwargs.setdefault("bought_from", distribution)
+        return Stock.objects.create(
+            product=product,
+            qty=qty,
+            expiry_date=expiry_date,
+            **kwargs,
+        )
+
+    return make_stock
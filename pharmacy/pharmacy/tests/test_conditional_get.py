@@ -0,0 +1,63 @@
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+
+from pharmacy.core.models import Customer
+
+
+def test_unchanged_product_list_is_not_modified(api_client, product, make_stock):
+    make_stock(product, 3)
+    etag = api_client.get("/products/")["ETag"]
+
+    with CaptureQueriesContext(connection) as context:
+        response = api_client.get("/products/", HTTP_IF_NONE_MATCH=etag)
+    assert response.status_code == 304
+    assert response.data is None
+    # Only the fingerprint, neither the page nor its count
+    assert len(context.captured_queries) == 1
+
+    # Other filters or pages are different representations
+    other = api_client.get("/products/", {"ordering": "-name"}, HTTP_IF_NONE_MATCH=etag)
+    assert other.status_code == 200
+
+
+def test_stock_changes_invalidate_the_product_list(api_client, product, make_stock):
+    etag = api_client.get("/products/")["ETag"]
+
+    make_stock(product, 3)
+    response = api_client.get("/products/", HTTP_IF_NONE_MATCH=etag)
+    assert response.status_code == 200
+    assert response.data["results"][0]["total_qty"] == 3
+
+
+def test_renamed_company_invalidates_the_product_list(api_client, product):
+    etag = api_client.get("/products/")["ETag"]
+
+    product.company.name = "GlaxoSmithKline"
+    product.company.save()
+    response = api_client.get("/products/", HTTP_IF_NONE_MATCH=etag)
+    assert response.status_code == 200
+    assert response.data["results"][0]["company_name"] == "GlaxoSmithKline"
+
+
+def test_deleted_stock_invalidates_the_stock_list(api_client, product, make_stock):
+    make_stock(product, 1)
+    stock = make_stock(product, 2)
+    etag = api_client.get("/stocks/")["ETag"]
+
+    stock.delete()
+    assert api_client.get("/stocks/", HTTP_IF_NONE_MATCH=etag).status_code == 200
+
+
+def test_detail_honors_if_modified_since(api_client, db):
+    customer = Customer.objects.create(name="Walk-in")
+    response = api_client.get(f"/customer/{customer.pk}/")
+    last_modified = response["Last-Modified"]
+
+    response = api_client.get(
+        f"/customer/{customer.pk}/", HTTP_IF_MODIFIED_SINCE=last_modified
+    )
+    assert response.status_code == 304
+
+    response = api_client.get(f"/customer/{customer.pk}/", HTTP_IF_NONE_MATCH='"stale"')
+    assert response.status_code == 200
+    assert response.data["name"] == "Walk-in"
@@ -0,0 +1,60 @@
+import csv
+import io
+import json
+
+from pharmacy.core.models import Customer
+from pharmacy.product.models import Order
+
+
+def read_export(response):
+    assert response.status_code == 200
+    assert response["Content-Disposition"].startswith("attachment;")
+    return b"".join(response.streaming_content).decode()
+
+
+def test_product_export_honors_filters(api_client, make_product, make_stock):
+    make_stock(make_product("Panadol"), 5)
+    make_product("Brufen")
+
+    content = read_export(api_client.get("/products/export/", {"name": "Panadol"}))
+    rows = list(csv.DictReader(io.StringIO(content)))
+    assert [(row["name"], row["company"], row["total_qty"]) for row in rows] == [
+        ("Panadol", "GSK", "5")
+    ]
+
+
+def test_stock_export_as_json_lines(api_client, product, make_stock):
+    make_stock(product, 0)
+    stock = make_stock(product, 5, barcode="ABC123")
+
+    response = api_client.get(
+        "/stocks/export/", {"file_format": "jsonl", "showInactive": "false"}
+    )
+    assert response["Content-Type"] == "application/x-ndjson"
+    rows = [json.loads(line) for line in read_export(response).splitlines()]
+    assert [(row["id"], row["barcode"], row["product_name"]) for row in rows] == [
+        (stock.pk, "ABC123", "Panadol")
+    ]
+
+
+def test_order_export_filters_by_status(api_client, user):
+    customer = Customer.objects.create(name="Walk-in")
+    for status in ["Pending", "Completed"]:
+        Order.objects.create(
+            customer=customer,
+            status=status,
+            total_amount=10,
+            total_after_disc=10,
+            created_by=user,
+        )
+
+    content = read_export(api_client.get("/orders/export/", {"status": "Completed"}))
+    rows = list(csv.DictReader(io.StringIO(content)))
+    assert [(row["status"], row["customer"], row["created_by"]) for row in rows] == [
+        ("Completed", "Walk-in", "cashier")
+    ]
+
+
+def test_unknown_export_format_is_rejected(api_client, db):
+    response = api_client.get("/products/export/", {"file_format": "xlsx"})
+    assert response.status_code == 400
@@ -0,0 +1,28 @@
+import pytest
+
+from pharmacy.middleware import QueryBudgetExceeded
+
+
+def test_responses_report_sql_time(api_client, product):
+    response = api_client.get("/products/")
+
+    assert response.status_code == 200
+    assert response["Server-Timing"].startswith("db;dur=")
+    assert response["Server-Timing"].endswith('desc="3 queries"')
+
+
+def test_views_over_budget_raise_in_tests(api_client, product, settings):
+    settings.QUERY_BUDGETS = {"ProductViewSet.list": 1}
+
+    with pytest.raises(QueryBudgetExceeded, match="ProductViewSet.list ran 3"):
+        api_client.get("/products/")
+
+
+def test_views_over_budget_only_warn_when_not_strict(
+    api_client, product, settings, caplog
+):
+    settings.QUERY_BUDGETS = {"ProductViewSet.list": 1}
+    settings.QUERY_BUDGET_STRICT = False
+
+    assert api_client.get("/products/").status_code == 200
+    assert "its budget is 1" in caplog.text
@@ -0,0 +1,121 @@
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+
+from pharmacy.core.models import Customer
+from pharmacy.product.models import Order
+
+
+def create_order(api_client, customer, stocks):
+    payload = {
+        "customer": customer.pk,
+        "total_after_disc": 10 * len(stocks),
+        "stock_orders": [{"stock": stock.pk, "quantity": 1} for stock in stocks],
+    }
+    with CaptureQueriesContext(connection) as context:
+        response = api_client.post("/orders/", payload, format="json")
+    assert response.status_code == 201, response.data
+    return response, len(context.captured_queries)
+
+
+def test_order_creation_query_count_is_constant(api_client, product, make_stock):
+    customer = Customer.objects.create(name="Walk-in")
+    stocks = [make_stock(product, 5) for _ in range(200)]
+
+    _, single_line_queries = create_order(api_client, customer, stocks[:1])
+    response, many_lines_queries = create_order(api_client, customer, stocks)
+
+    assert single_line_queries == many_lines_queries
+    assert len(response.data["stock_orders"]) == 200
+    assert float(response.data["total_amount"]) == 2000
+
+
+def test_order_creation_rejects_insufficient_stock(api_client, product, make_stock):
+    customer = Customer.objects.create(name="Walk-in")
+    stock = make_stock(product, 1)
+    payload = {
+        "customer": customer.pk,
+        "total_after_disc": 20,
+        "stock_orders": [
+            {"stock": stock.pk, "quantity": 1},
+            {"stock": stock.pk, "quantity": 1},
+        ],
+    }
+
+    response = api_client.post("/orders/", payload, format="json")
+
+    assert response.status_code == 400
+    assert not Order.objects.exists()
+
+
+def test_status_transitions_move_stock_quantities(api_client, product, make_stock):
+    customer = Customer.objects.create(name="Walk-in")
+    stock = make_stock(product, 5)
+    response, _ = create_order(api_client, customer, [stock, stock])
+    order_id = response.data["id"]
+
+    response = api_client.patch(
+        f"/orders/{order_id}/", {"status": "Completed"}, format="json"
+    )
+    assert response.status_code == 200
+    stock.refresh_from_db()
+    assert stock.qty == 3
+    assert product.stock_summary.live_qty == 3
+
+    response = api_client.patch(
+        f"/orders/{order_id}/", {"status": "Cancelled"}, format="json"
+    )
+    assert response.status_code == 200
+    stock.refresh_from_db()
+    assert stock.qty == 5
+
+
+def test_completing_order_cannot_oversell(api_client, product, make_stock):
+    customer = Customer.objects.create(name="Walk-in")
+    stock = make_stock(product, 2)
+    first, _ = create_order(api_client, customer, [stock, stock])
+    second, _ = create_order(api_client, customer, [stock])
+
+    api_client.patch(f"/orders/{first.data['id']}/", {"status": "Completed"})
+    response = api_client.patch(
+        f"/orders/{second.data['id']}/", {"status": "Completed"}, format="json"
+    )
+
+    assert response.status_code == 400
+    stock.refresh_from_db()
+    assert stock.qty == 0
+    assert Order.objects.get(pk=second.data["id"]).status == "Pending"
+
+
+def test_order_list_is_keyset_paginated_and_filtered(api_client, product, make_stock):
+    customer = Customer.objects.create(name="Walk-in")
+    stocks = [make_stock(product, 5) for _ in range(3)]
+    order_ids = [
+        create_order(api_client, customer, stocks)[0].data["id"] for _ in range(3)
+    ]
+    api_client.patch(f"/orders/{order_ids[0]}/", {"status": "Completed"}, format="json")
+
+    with CaptureQueriesContext(connection) as context:
+        response = api_client.get("/orders/", {"perPage": 2})
+    # The orders and one prefetch of every line with its stock and product
+    assert len(context.captured_queries) == 2
+    assert [order["id"] for order in response.data["results"]] == order_ids[:0:-1]
+    assert len(response.data["results"][0]["stock_orders"]) == 3
+
+    response = api_client.get(
+        "/orders/", {"perPage": 2, "cursor": response.data["next_cursor"]}
+    )
+    assert [order["id"] for order in response.data["results"]] == order_ids[:1]
+    assert response.data["has_next_page"] is False
+
+    response = api_client.get("/orders/", {"status": "Completed"})
+    assert [order["id"] for order in response.data["results"]] == order_ids[:1]
+
+
+def test_order_detail(api_client, product, make_stock):
+    customer = Customer.objects.create(name="Walk-in")
+    response, _ = create_order(api_client, customer, [make_stock(product, 5)])
+
+    response = api_client.get(f"/orders/{response.data['id']}/")
+    assert response.data["customer"]["name"] == "Walk-in"
+    assert response.data["stock_orders"][0]["stock"]["product"]["name"] == "Panadol"
+    assert api_client.get("/orders/999/").status_code == 404
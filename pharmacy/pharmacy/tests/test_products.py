@@ -0,0 +1,146 @@
+from datetime import date, timedelta
+from unittest.mock import ANY
+
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+
+
+def test_products_are_ordered_by_total_qty_in_sql(api_client, make_product, make_stock):
+    for name, qty in [("Brufen", 7), ("Arinac", 2), ("Calpol", 12)]:
+        make_stock(make_product(name), qty)
+    make_stock(make_product("Disprin"), 50, date.today() - timedelta(days=1))
+
+    with CaptureQueriesContext(connection) as context:
+        response = api_client.get("/products/?ordering=-total_qty")
+
+    assert response.status_code == 200
+    assert [(row["name"], row["total_qty"]) for row in response.data["results"]] == [
+        ("Calpol", 12),
+        ("Brufen", 7),
+        ("Arinac", 2),
+        ("Disprin", 0),
+    ]
+    # total_qty comes from the list query, not from an aggregate per row
+    assert not any(
+        query["sql"].startswith("SELECT SUM") for query in context.captured_queries
+    )
+
+
+def test_expiration_filters(api_client, make_product, make_stock):
+    today = date.today()
+    make_stock(make_product("Expired"), 1, today - timedelta(days=3))
+    short = make_product("Short")
+    make_stock(short, 1, today + timedelta(days=30))
+    make_stock(short, 1, today + timedelta(days=90))
+    make_stock(make_product("Fresh"), 1, today + timedelta(days=400))
+    make_product("Empty")
+
+    def names(url, value):
+        response = api_client.get(url, {"expiration": value})
+        assert response.status_code == 200
+        return sorted(
+            row.get("name") or row["product_name"] for row in response.data["results"]
+        )
+
+    assert names("/products/", "expired") == ["Expired"]
+    assert names("/products/", "shortExpired") == ["Short"]
+    assert names("/products/", "expiredAndShortExpired") == ["Expired", "Short"]
+    assert names("/stocks/", "shortExpired") == ["Short", "Short"]
+
+
+def test_search_ranks_matching_products(api_client, make_product, make_stock):
+    for name in ["Lispan", "Panadol Extra", "Panadol", "Brufen", "Xanax"]:
+        make_stock(make_product(name), 1)
+    renamed = make_product("Calpol")
+    renamed.name = "Calpol Paediatric"
+    renamed.save()
+
+    def names(url, field="name", **params):
+        response = api_client.get(url, params)
+        return [row[field] for row in response.data["results"]]
+
+    # Prefix matches first, then earlier and shorter matches
+    assert names("/products/", search="pan") == ["Panadol", "Panadol Extra", "Lispan"]
+    assert names("/products/", search="anad") == ["Panadol", "Panadol Extra"]
+    assert names("/stocks/", "product_name", search="pan") == [
+        "Panadol",
+        "Panadol Extra",
+        "Lispan",
+    ]
+    # Other filters narrow the matches down, they don't replace the ranking
+    assert names("/products/", search="pan", name__icontains="ol") == [
+        "Panadol",
+        "Panadol Extra",
+    ]
+    assert names("/products/", search="pan", ordering="-name") == [
+        "Panadol Extra",
+        "Panadol",
+        "Lispan",
+    ]
+
+    response = api_client.get("/products/", {"search": "paed"})
+    assert [row["name"] for row in response.data["results"]] == ["Calpol Paediatric"]
+
+    response = api_client.get("/stocks/", {"search": "bru"})
+    assert [row["product_name"] for row in response.data["results"]] == ["Brufen"]
+
+    # Terms shorter than a trigram fall back to icontains
+    response = api_client.get("/products/", {"search": "xa"})
+    assert [row["name"] for row in response.data["results"]] == ["Xanax"]
+
+
+def test_autocomplete_matches_name_formula_and_barcode_prefixes(
+    api_client, make_product, make_stock, django_capture_on_commit_callbacks
+):
+    panadol = make_product("Panadol Extra")
+    make_product("Brufen", formula=None)
+    stock = make_stock(panadol, 5)
+
+    def lookup(q):
+        response = api_client.get("/products/autocomplete/", {"q": q})
+        assert response.status_code == 200
+        return [row["name"] for row in response.data]
+
+    assert lookup("pana") == ["Panadol Extra"]
+    assert lookup("ext") == ["Panadol Extra"]
+    assert lookup("parac") == ["Panadol Extra"]
+    assert lookup(stock.barcode[:6]) == ["Panadol Extra"]
+    assert lookup("xyz") == []
+    assert api_client.get("/products/autocomplete/", {"q": "bru"}).data == [
+        {"id": ANY, "name": "Brufen", "product_type": "TAB", "qty": 0}
+    ]
+
+    # Committed writes are applied to the built index in place
+    with django_capture_on_commit_callbacks(execute=True):
+        make_stock(make_product("Calpol"), 3)
+    with CaptureQueriesContext(connection) as context:
+        assert api_client.get("/products/autocomplete/", {"q": "cal"}).data == [
+            {"id": ANY, "name": "Calpol", "product_type": "TAB", "qty": 3}
+        ]
+    # Served from memory; only the authentication lookup may hit the database
+    assert not any("product_product" in q["sql"] for q in context.captured_queries)
+
+
+def test_list_is_flat_unless_fields_are_expanded(api_client, product, make_stock):
+    make_stock(product, 3)
+
+    row = api_client.get("/products/").data["results"][0]
+    assert row["company"] == product.company_id
+    assert row["company_name"] == "GSK"
+    assert "stocks" not in row
+
+    response = api_client.get(
+        "/products/", {"fields": "id,name,company,stocks", "expand": "company,stocks"}
+    )
+    row = response.data["results"][0]
+    assert set(row) == {"id", "name", "company", "stocks"}
+    assert row["company"]["name"] == "GSK"
+    assert [stock["qty"] for stock in row["stocks"]] == [3]
+
+    response = api_client.get(
+        "/stocks/", {"fields": "qty,product", "expand": "product"}
+    )
+    assert response.data["results"] == [{"qty": 3, "product": ANY}]
+    assert response.data["results"][0]["product"]["name"] == "Panadol"
+
+    assert api_client.get("/products/", {"fields": "nope"}).status_code == 400
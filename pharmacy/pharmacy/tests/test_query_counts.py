@@ -0,0 +1,58 @@
+import pytest
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+
+from pharmacy.core.models import Distribution
+
+
+def count_queries(api_client, url, data=None):
+    with CaptureQueriesContext(connection) as context:
+        response = api_client.get(url, data)
+    assert response.status_code == 200
+    return len(context.captured_queries)
+
+
+@pytest.fixture
+def add_products(make_product, make_stock, django_capture_on_commit_callbacks):
+    created = []
+
+    def add_products(count):
+        # Cached list counts are invalidated on commit
+        with django_capture_on_commit_callbacks(execute=True):
+            for _ in range(count):
+                product = make_product(f"Product {len(created)}")
+                make_stock(product, 5)
+                make_stock(product, 2)
+                # Batches without a supplier must render too
+                make_stock(product, 1, bought_from=None)
+                created.append(product)
+        return created[-1]
+
+    return add_products
+
+
+@pytest.mark.parametrize(
+    "url, data",
+    [
+        ("/products/", None),
+        ("/products/", {"expand": "company,distribution,formula,stocks"}),
+        ("/stocks/", None),
+        ("/stocks/", {"expand": "product,bought_from"}),
+    ],
+)
+def test_list_query_count_does_not_grow_with_page_size(
+    api_client, add_products, url, data
+):
+    add_products(2)
+    few = count_queries(api_client, url, data)
+
+    add_products(10)
+    assert count_queries(api_client, url, data) == few
+
+
+def test_product_detail_uses_prefetched_suppliers(api_client, add_products):
+    product = add_products(1)
+    Distribution.objects.create(name="Other")
+
+    # conditional GET timestamps, product (+ joins), stocks (+ supplier join)
+    assert count_queries(api_client, f"/products/{product.pk}/") == 3
@@ -0,0 +1,13 @@
+from io import StringIO
+
+from django.core.management import call_command
+
+
+def test_check_query_plans_runs(product, make_stock):
+    make_stock(product, 5)
+    out = StringIO()
+
+    call_command("check_query_plans", stdout=out)
+
+    assert "products list" in out.getvalue()
+    assert "stocks expiration=expired" in out.getvalue()
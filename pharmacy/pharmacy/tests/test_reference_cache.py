@@ -0,0 +1,51 @@
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+
+from pharmacy.core.models import Company, Formula
+
+
+def test_reference_lists_are_cached_until_they_change(
+    api_client, db, django_capture_on_commit_callbacks
+):
+    Formula.objects.create(name="Ibuprofen")
+
+    first = api_client.get("/formula/")
+    with CaptureQueriesContext(connection) as context:
+        second = api_client.get("/formula/")
+    assert second.data == first.data
+    assert len(context.captured_queries) == 0
+
+    with django_capture_on_commit_callbacks(execute=True):
+        Formula.objects.create(name="Paracetamol")
+        # The cached list stays until the change is committed
+        assert api_client.get("/formula/").data == first.data
+    third = api_client.get("/formula/")
+    assert [row["name"] for row in third.data] == ["Ibuprofen", "Paracetamol"]
+    assert third["ETag"] != first["ETag"]
+
+
+def test_matching_etag_returns_not_modified(
+    api_client, db, django_capture_on_commit_callbacks
+):
+    Company.objects.create(name="GSK")
+    etag = api_client.get("/company/")["ETag"]
+
+    with CaptureQueriesContext(connection) as context:
+        response = api_client.get("/company/", HTTP_IF_NONE_MATCH=etag)
+    assert response.status_code == 304
+    assert len(context.captured_queries) == 0
+
+    with django_capture_on_commit_callbacks(execute=True):
+        Company.objects.create(name="Abbott")
+    assert api_client.get("/company/", HTTP_IF_NONE_MATCH=etag).status_code == 200
+
+
+def test_company_by_distribution_follows_product_changes(
+    api_client, distribution, make_product, django_capture_on_commit_callbacks
+):
+    params = {"distribution_id": distribution.pk}
+    assert api_client.get("/company/", params).data == []
+
+    with django_capture_on_commit_callbacks(execute=True):
+        make_product()
+    assert [row["name"] for row in api_client.get("/company/", params).data] == ["GSK"]
@@ -0,0 +1,45 @@
+from unittest import mock
+
+from pharmacy.db.routers import ReplicaRouter, read_from_replica, replica_reads
+from pharmacy.product.models import Product
+
+
+def test_only_reads_inside_read_from_replica_go_to_replicas(settings):
+    settings.DATABASE_REPLICAS = ["replica_0"]
+    router = ReplicaRouter()
+
+    assert router.db_for_read(Product) == "default"
+    with read_from_replica():
+        assert router.db_for_read(Product) == "replica_0"
+        assert router.db_for_write(Product) == "default"
+    assert router.db_for_read(Product) == "default"
+
+    assert router.allow_migrate("default", "product")
+    assert not router.allow_migrate("replica_0", "product")
+
+
+def test_product_and_stock_reads_are_routed_to_replicas(
+    api_client, product, make_stock, settings
+):
+    # The test database stands in for the replica
+    settings.DATABASE_REPLICAS = ["default"]
+    settings.DATABASE_ROUTERS = ["pharmacy.db.routers.ReplicaRouter"]
+    make_stock(product, 1)
+    reads = []
+
+    def db_for_read(self, model, **hints):
+        reads.append(replica_reads.get())
+        return "default"
+
+    with mock.patch.object(ReplicaRouter, "db_for_read", db_for_read):
+        for url in ["/products/", f"/products/{product.pk}/", "/stocks/"]:
+            reads.clear()
+            assert api_client.get(url).status_code == 200
+            assert reads and all(reads)
+
+        # Other actions, here the autocomplete index build, read from the primary
+        reads.clear()
+        assert api_client.get("/products/autocomplete/", {"q": "pa"}).data
+        assert reads and not any(reads)
+
+    assert not replica_reads.get()
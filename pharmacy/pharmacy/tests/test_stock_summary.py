@@ -0,0 +1,45 @@
+from datetime import date, timedelta
+
+from django.core.management import call_command
+
+from pharmacy.product.models import Product, ProductStockSummary
+
+
+def test_summary_follows_stock_changes(product, make_stock):
+    today = date.today()
+    make_stock(product, 5)
+    make_stock(product, 3, today + timedelta(days=30))
+    expired = make_stock(product, 2, today - timedelta(days=1))
+
+    summary = ProductStockSummary.objects.get(product=product)
+    assert (summary.live_qty, summary.expired_qty, summary.short_expired_qty) == (
+        8,
+        2,
+        3,
+    )
+
+    expired.delete()
+    summary.refresh_from_db()
+    assert summary.expired_qty == 0
+
+
+def test_total_qty_reads_summary_without_queries(
+    product, make_stock, django_assert_num_queries
+):
+    make_stock(product, 4)
+    product = Product.objects.select_related("stock_summary").get(pk=product.pk)
+
+    with django_assert_num_queries(0):
+        assert product.total_qty == 4
+        assert product.total_qty_expired_and_short_expired == 0
+
+
+def test_rebuild_rolls_expiry_buckets_forward(product, make_stock):
+    make_stock(product, 6, date.today())
+    ProductStockSummary.refresh([product.pk], today=date.today() - timedelta(days=1))
+
+    call_command("rebuild_stock_summary")
+
+    summary = ProductStockSummary.objects.get(product=product)
+    assert summary.as_of == date.today()
+    assert summary.short_expired_qty == 6
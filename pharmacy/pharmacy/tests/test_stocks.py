@@ -0,0 +1,123 @@
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+
+from pharmacy.product.models import ProductStockSummary, Stock
+
+
+def stock_writes(context):
+    return [
+        query["sql"]
+        for query in context.captured_queries
+        if query["sql"].startswith(("INSERT", "UPDATE"))
+        and '"product_stock"' in query["sql"].split("(")[0]
+    ]
+
+
+def test_stock_barcode_is_written_with_the_row(product):
+    with CaptureQueriesContext(connection) as context:
+        stock = Stock.objects.create(
+            product=product, qty=3, price_per_unit=10, purchase_price=8
+        )
+
+    assert stock.barcode == str(stock.pk)
+    assert len(stock_writes(context)) == 1
+
+
+def test_bulk_created_stocks_get_barcodes(product):
+    existing = Stock.objects.create(
+        product=product, qty=1, price_per_unit=10, purchase_price=8
+    )
+
+    Stock.objects.bulk_create(
+        Stock(product=product, qty=2, price_per_unit=10, purchase_price=8)
+        for _ in range(3)
+    )
+
+    stocks = Stock.objects.exclude(pk=existing.pk)
+    assert [stock.barcode for stock in stocks] == [str(stock.pk) for stock in stocks]
+    assert all(stock.pk > existing.pk for stock in stocks)
+    assert product.stock_summary.live_qty == 7
+
+
+def test_bulk_intake_from_json(api_client, product, distribution):
+    payload = {
+        "bought_from": distribution.pk,
+        "stocks": [
+            {
+                "product": product.pk,
+                "qty": 10,
+                "price_per_unit": 5,
+                "purchase_price": 4,
+            },
+            {
+                "product": product.pk,
+                "qty": 20,
+                "price_per_unit": 5,
+                "purchase_price": 4,
+                "expiry_date": "2030-01-01",
+            },
+        ],
+    }
+
+    response = api_client.post("/stocks/bulk/", payload, format="json")
+
+    assert response.status_code == 201, response.data
+    assert response.data["created"] == 2
+    stocks = Stock.objects.filter(bought_from=distribution)
+    assert sorted(stock.qty for stock in stocks) == [10, 20]
+    assert all(stock.barcode == str(stock.pk) for stock in stocks)
+
+
+def test_bulk_intake_from_csv_reports_line_errors(api_client, product, distribution):
+    upload = SimpleUploadedFile(
+        "delivery.csv",
+        (
+            "product,qty,price_per_unit,purchase_price,expiry_date\n"
+            f"{product.pk},10,5,4,2030-01-01\n"
+            "999999,3,5,4,\n"
+        ).encode(),
+    )
+
+    response = api_client.post(
+        "/stocks/bulk/", {"bought_from": distribution.pk, "file": upload}
+    )
+
+    assert response.status_code == 400
+    assert "product" in response.data["stocks"][1]
+    assert not Stock.objects.exists()
+
+
+def test_scan_returns_compact_payload_from_cache(
+    api_client, product, make_stock, django_capture_on_commit_callbacks
+):
+    stock = make_stock(product, 4)
+
+    response = api_client.get(f"/stocks/scan/{stock.barcode}/")
+    assert response.status_code == 200
+    assert response.data == {
+        "id": stock.pk,
+        "barcode": stock.barcode,
+        "qty": 4,
+        "price_per_unit": 10,
+        "expiry_date": None,
+        "product": {
+            "id": product.pk,
+            "name": "Panadol",
+            "product_type": "TAB",
+            "per_pack": 1,
+        },
+    }
+
+    with CaptureQueriesContext(connection) as context:
+        assert api_client.get(f"/stocks/scan/{stock.barcode}/").status_code == 200
+    assert not any("product_stock" in q["sql"] for q in context.captured_queries)
+
+    # Any committed stock change invalidates cached scans
+    with django_capture_on_commit_callbacks(execute=True):
+        Stock.objects.filter(pk=stock.pk).update(qty=1)
+        ProductStockSummary.refresh([product.pk])
+        assert api_client.get(f"/stocks/scan/{stock.barcode}/").data["qty"] == 4
+    assert api_client.get(f"/stocks/scan/{stock.barcode}/").data["qty"] == 1
+
+    assert api_client.get("/stocks/scan/999999/").status_code == 404
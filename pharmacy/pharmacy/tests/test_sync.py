@@ -0,0 +1,75 @@
+import json
+
+import pytest
+
+from pharmacy.product import sync
+from pharmacy.product.models import Tombstone
+
+
+@pytest.fixture(autouse=True)
+def no_watermark_skew(monkeypatch):
+    monkeypatch.setattr(sync, "SYNC_WATERMARK_SKEW", 0)
+
+
+def read_sync(api_client, **params):
+    response = api_client.get("/sync/", params)
+    assert response.status_code == 200
+    assert response["Content-Type"] == "application/x-ndjson"
+    lines = [
+        json.loads(line) for line in b"".join(response.streaming_content).splitlines()
+    ]
+    assert lines[-1] == {"done": True}
+    return lines
+
+
+def rows_of(lines, model):
+    return [
+        dict(zip(line["fields"], row))
+        for line in lines
+        if line.get("model") == model and "rows" in line
+        for row in line["rows"]
+    ]
+
+
+def test_full_sync_sends_the_catalog(api_client, product, make_stock):
+    stock = make_stock(product, 5)
+
+    lines = read_sync(api_client)
+    assert lines[0]["full"] is True
+    assert [row["name"] for row in rows_of(lines, "product")] == ["Panadol"]
+    assert rows_of(lines, "stock")[0]["id"] == stock.pk
+    assert rows_of(lines, "company")[0]["name"] == "GSK"
+
+
+def test_delta_sends_changes_and_deletions(api_client, make_product, make_stock):
+    kept = make_product("Panadol")
+    removed = make_product("Brufen")
+    stock = make_stock(kept, 5)
+    watermark = read_sync(api_client)[0]["watermark"]
+
+    stock.qty = 3
+    stock.save()
+    removed_id = removed.pk
+    removed.delete()
+
+    lines = read_sync(api_client, since=watermark)
+    assert lines[0]["full"] is False
+    assert [(row["id"], row["qty"]) for row in rows_of(lines, "stock")] == [
+        (stock.pk, 3)
+    ]
+    assert rows_of(lines, "product") == []
+    assert {"model": "product", "deleted": [removed_id]} in lines
+
+
+def test_invalid_since_is_rejected(api_client, db):
+    assert api_client.get("/sync/", {"since": "yesterday"}).status_code == 400
+
+
+def test_stale_terminals_resync_in_full(api_client, product):
+    product_id = product.pk
+    product.delete()
+    assert Tombstone.objects.filter(model="product", object_id=product_id).exists()
+
+    lines = read_sync(api_client, since="2000-01-01T00:00:00Z")
+    assert lines[0]["full"] is True
+    assert not any("deleted" in line for line in lines)
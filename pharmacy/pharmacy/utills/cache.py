@@ -0,0 +1,35 @@
+from uuid import uuid4
+from django.core.cache import cache
+from django.db import transaction
+
+
+def _version_key(namespace):
+    return f"cache-version:{namespace}"
+
+
+def get_cache_version(namespace):
+    """
+    Current version of a cache namespace. Embedding it in cache keys lets a
+    single bump invalidate every entry of the namespace at once.
+    """
+    version = cache.get(_version_key(namespace))
+    if version is None:
+        cache.add(_version_key(namespace), uuid4().hex, timeout=None)
+        version = cache.get(_version_key(namespace))
+    return version
+
+
+def bump_cache_version(*namespaces):
+    # Random versions never collide with entries left over from an evicted counter
+    cache.set_many(
+        {_version_key(namespace): uuid4().hex for namespace in namespaces},
+        timeout=None,
+    )
+
+
+def bump_cache_version_on_commit(*namespaces, using=None):
+    """
+    Bump once the current transaction commits. Bumping earlier lets a concurrent
+    request cache the not yet committed, old data under the new version.
+    """
+    transaction.on_commit(lambda: bump_cache_version(*namespaces), using=using)
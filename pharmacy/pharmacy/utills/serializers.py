@@ -0,0 +1,48 @@
+from rest_framework.exceptions import ValidationError
+
+
+def get_list_param(request, name):
+    """Comma separated query parameter as a set, e.g. ?expand=company,formula."""
+    if request is None:
+        return set()
+    value = request.query_params.get(name, "")
+    return {item.strip() for item in value.split(",") if item.strip()}
+
+
+class SparseFieldsetMixin:
+    """
+    Lets clients shape the top-level representation of a response:
+
+    * ``?fields=id,name`` renders only the listed fields.
+    * ``?expand=company`` swaps a flat field for the nested serializer declared in
+      ``expandable_fields``, e.g. ``{"company": (CompanySerializer, {})}``.
+
+    Input validation is never affected, only serializers that render existing
+    instances.
+    """
+
+    fields_query_param = "fields"
+    expand_query_param = "expand"
+    expandable_fields = {}
+
+    def get_fields(self):
+        fields = super().get_fields()
+        request = self.context.get("request")
+        # Only the serializer the view renders, not nested ones or input data
+        if hasattr(self, "initial_data") or self.root not in (self, self.parent):
+            return fields
+
+        for name in get_list_param(request, self.expand_query_param):
+            if name in self.expandable_fields:
+                serializer_class, kwargs = self.expandable_fields[name]
+                fields[name] = serializer_class(read_only=True, **kwargs)
+
+        only = get_list_param(request, self.fields_query_param)
+        if only:
+            unknown = only - set(fields)
+            if unknown:
+                raise ValidationError(
+                    {self.fields_query_param: f"Unknown fields: {sorted(unknown)}"}
+                )
+            fields = {name: field for name, field in fields.items() if name in only}
+        return fields
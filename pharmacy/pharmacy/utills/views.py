@@ -0,0 +1,141 @@
+import hashlib
+import json
+from datetime import date
+
+from django.core.cache import cache
+from django.db.models import Count, Max
+from django.utils.cache import parse_etags
+from django.utils.http import http_date, parse_http_date_safe
+from pharmacy.config import REFERENCE_CACHE_TIMEOUT
+from pharmacy.utills.cache import get_cache_version
+from rest_framework import status
+from rest_framework.response import Response
+
+
+def query_params_digest(request):
+    params = sorted(
+        (key, value) for key, values in request.query_params.lists() for value in values
+    )
+    return hashlib.md5(json.dumps(params).encode()).hexdigest()
+
+
+class CachedListMixin:
+    """
+    Caches the ``list`` response under ``cache_namespace``, whose version is
+    bumped by signals whenever the underlying data changes. The version doubles
+    as the ETag, so a client revalidating with ``If-None-Match`` gets a 304
+    from the cache version alone.
+    """
+
+    cache_namespace = None
+    cache_timeout = REFERENCE_CACHE_TIMEOUT
+
+    def list(self, request, *args, **kwargs):
+        digest = query_params_digest(request)
+        version = get_cache_version(self.cache_namespace)
+        etag = f'"{self.cache_namespace}-{version}-{digest}"'
+        headers = {"ETag": etag, "Cache-Control": "private, no-cache"}
+
+        if_none_match = request.headers.get("If-None-Match", "")
+        if etag in parse_etags(if_none_match) or if_none_match.strip() == "*":
+            return Response(status=status.HTTP_304_NOT_MODIFIED, headers=headers)
+
+        key = f"responses:{self.cache_namespace}:{version}:{digest}"
+        data = cache.get(key)
+        if data is None:
+            data = super().list(request, *args, **kwargs).data
+            cache.set(key, data, self.cache_timeout)
+        return Response(data, headers=headers)
+
+
+class ConditionalGetMixin:
+    """
+    Answers conditional GETs with a 304 before anything is serialized.
+
+    ``list`` fingerprints the filtered queryset with the count and the latest
+    ``conditional_fields`` timestamps in one aggregate query, and only sends an
+    ETag, since a date can't tell that rows were deleted. ``retrieve`` uses the
+    row's own timestamps and also honors ``If-Modified-Since``.
+    """
+
+    # Timestamps that change whenever the rendered data does, e.g. those of
+    # related rows whose names are rendered too
+    conditional_fields = ["updated_at"]
+    conditional_actions = ["list", "retrieve"]
+
+    def list(self, request, *args, **kwargs):
+        render = super().list
+        if "list" not in self.conditional_actions:
+            return render(request, *args, **kwargs)
+
+        queryset = self.filter_queryset(self.get_queryset()).order_by()
+        state = queryset.aggregate(
+            count=Count("pk"),
+            **{
+                f"last_{index}": Max(field)
+                for index, field in enumerate(self.conditional_fields)
+            },
+        )
+        return self.conditional_response(
+            request, state, None, lambda: render(request, *args, **kwargs)
+        )
+
+    def retrieve(self, request, *args, **kwargs):
+        render = super().retrieve
+        lookup_url_kwarg = self.lookup_url_kwarg or self.lookup_field
+        if "retrieve" not in self.conditional_actions:
+            return render(request, *args, **kwargs)
+
+        state = (
+            self.get_queryset()
+            .filter(**{self.lookup_field: kwargs[lookup_url_kwarg]})
+            .values_list(*self.conditional_fields)
+            .first()
+        )
+        if state is None:
+            return render(request, *args, **kwargs)
+        last_modified = max(
+            (value for value in state if value is not None), default=None
+        )
+        return self.conditional_response(
+            request,
+            state,
+            last_modified,
+            lambda: render(request, *args, **kwargs),
+        )
+
+    def conditional_response(self, request, state, last_modified, render):
+        # Today's date is part of it, derived values like expiry buckets roll
+        # over without any row changing
+        fingerprint = json.dumps(
+            [query_params_digest(request), str(date.today()), state],
+            sort_keys=True,
+            default=str,
+        )
+        etag = f'"{hashlib.md5(fingerprint.encode()).hexdigest()}"'
+        headers = {"ETag": etag, "Cache-Control": "private, no-cache"}
+        if last_modified is not None:
+            headers["Last-Modified"] = http_date(last_modified.timestamp())
+
+        if self.is_not_modified(request, etag, last_modified):
+            return Response(status=status.HTTP_304_NOT_MODIFIED, headers=headers)
+
+        response = render()
+        for name, value in headers.items():
+            response[name] = value
+        return response
+
+    @staticmethod
+    def is_not_modified(request, etag, last_modified):
+        if_none_match = request.headers.get("If-None-Match")
+        if if_none_match:
+            return etag in parse_etags(if_none_match)
+
+        if_modified_since = parse_http_date_safe(
+            request.headers.get("If-Modified-Since", "")
+        )
+        return (
+            if_modified_since is not None
+            and last_modified is not None
+            and int(last_modified.timestamp()) <= if_modified_since
+        )
@@ -14,3 +14,8 @@ from django.core.wsgi import get_wsgi_application
 os.environ.setdefault("DJANGO_SETTINGS_MODULE", "pharmacy.settings")
 
 application = get_wsgi_application()
+
+from pharmacy.product.autocomplete import product_index  # noqa: E402
+
+# Build the point-of-sale autocomplete index before the first lookup needs it
+product_index.warm_up()